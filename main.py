@@ -1,33 +1,2843 @@
-import speech_recognition as sr
 import subprocess
 import time
 import re
 import os
 import sys
 import json
+import hashlib
+import base64
+import struct
+import io
+import argparse
+import copy
+import uuid
+import queue
+import shutil
+import socket
+import tempfile
 import threading
-import tkinter as tk
-from tkinter import ttk
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.action_chains import ActionChains
+import wave
+import functools
+import itertools
+import importlib
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from collections import namedtuple, deque, OrderedDict, Counter
+from urllib.parse import urljoin, urlparse, urldefrag
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 import logging
 
+class LazyImport:
+    """Module (or module attribute) that is imported on first use
+    
+    Keeps selenium, numpy, tkinter and speech_recognition off the import path so
+    startup steps that need them can load them in parallel, on their own threads.
+    """
+    
+    def __init__(self, module, attribute=None):
+        self._module = module
+        self._attribute = attribute
+        self._target = None
+    
+    def _load(self):
+        if self._target is None:
+            target = importlib.import_module(self._module)
+            self._target = getattr(target, self._attribute) if self._attribute else target
+        return self._target
+    
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+    
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+sr = LazyImport('speech_recognition')
+tk = LazyImport('tkinter')
+ttk = LazyImport('tkinter.ttk')
+webdriver = LazyImport('selenium.webdriver')
+By = LazyImport('selenium.webdriver.common.by', 'By')
+WebDriverWait = LazyImport('selenium.webdriver.support.ui', 'WebDriverWait')
+EC = LazyImport('selenium.webdriver.support.expected_conditions')
+Keys = LazyImport('selenium.webdriver.common.keys', 'Keys')
+Options = LazyImport('selenium.webdriver.chrome.options', 'Options')
+Service = LazyImport('selenium.webdriver.chrome.service', 'Service')
+ActionChains = LazyImport('selenium.webdriver.common.action_chains', 'ActionChains')
+np = LazyImport('numpy')
+BeautifulSoup = LazyImport('bs4', 'BeautifulSoup')
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Selectors used to discover job cards and apply buttons on career pages
+JOB_SELECTOR = ".job-listing, .career-item, .position, [class*='job'], [class*='position'], [class*='opening']"
+APPLY_BUTTON_SELECTOR = "button[class*='apply'], a[class*='apply'], .apply-btn, [href*='apply']"
+JOB_TITLE_SELECTOR = "h1, h2, h3, h4, .title, .job-title"
+# Upper bound on page text pulled from the browser; the prompt only ever carries
+# the chunks ContextRetriever ranks as relevant, not this whole text
+MAIN_CONTENT_LIMIT = 60000
+
+# Local state (crawled snapshots, caches) lives here so it survives restarts
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ai_voice_agent')
+# Per-site facts (company name, services, job keywords) in sites/<host>.json
+SITE_CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sites')
+DEFAULT_JOB_KEYWORDS = ['ai', 'intern', 'developer', 'designer', 'engineer', 'marketing']
+
+# Spoken as soon as the agent can take commands, instead of waiting on an LLM call
+WELCOME_TEMPLATE = ("Hi, I'm the voice assistant for the {company_name} website. Hold the talk button "
+                    "or the space bar and ask me about our services, open positions or any page. "
+                    "I can take you there and help you apply for a job.")
+# How long browser actions wait for Chrome to finish starting in the background
+BROWSER_STARTUP_TIMEOUT = 60.0
+
+# Models on the same OpenAI-compatible endpoint: a small, low-latency one for
+# simple turns and the large one for everything that needs it (see ModelRouter)
+FAST_MODEL = os.getenv('AGENT_FAST_MODEL', 'llama-3.1-8b-instant')
+LARGE_MODEL = os.getenv('AGENT_LARGE_MODEL', 'llama-3.3-70b-versatile')
+LLM_USAGE_HISTORY = 1000  # Latest completion requests kept for the model usage report
+
+# Shared by the page-model, locator-resolving and form scripts. cssPath() builds
+# a selector of nth-of-type steps up to the nearest ancestor with a unique id;
+# fingerprint() hashes (FNV-1a) a node's tag, identifying attributes and the
+# start of its text, so a locator can be checked before it is acted on.
+# resolve() finds the node again: the CSS path if the node there still has the
+# recorded fingerprint, otherwise any node of the same tag that does (content
+# moved), otherwise null. labelOf() is a form control's visible label.
+NODE_LOCATOR_JS = """
+const cssPath = el => {
+    const steps = [];
+    for (let node = el; node && node.nodeType === 1 && node !== document.documentElement; node = node.parentElement) {
+        if (node.id && document.querySelectorAll('#' + CSS.escape(node.id)).length === 1) {
+            steps.unshift('#' + CSS.escape(node.id));
+            return steps.join(' > ');
+        }
+        let index = 1;
+        for (let sibling = node.previousElementSibling; sibling; sibling = sibling.previousElementSibling) {
+            if (sibling.tagName === node.tagName) index++;
+        }
+        steps.unshift(node.tagName.toLowerCase() + ':nth-of-type(' + index + ')');
+    }
+    return steps.join(' > ');
+};
+const labelOf = el => {
+    const label = (el.id && document.querySelector('label[for="' + CSS.escape(el.id) + '"]')) || el.closest('label');
+    let t = label ? label.innerText.replace(el.tagName === 'SELECT' ? el.innerText : '', '') : '';
+    if (!t && el.getAttribute('aria-labelledby')) {
+        t = el.getAttribute('aria-labelledby').split(/\\s+/)
+            .map(id => (document.getElementById(id) || {}).innerText || '').join(' ');
+    }
+    return (t || el.getAttribute('aria-label') || '').replace(/\\s+/g, ' ').trim().slice(0, 80);
+};
+// Form fields are identified by what does not change as they are filled in; the
+// observer does not watch values, so a value in the fingerprint would go stale
+const FIELD_TAGS = new Set(['INPUT', 'TEXTAREA', 'SELECT']);
+const fingerprint = el => {
+    const identity = FIELD_TAGS.has(el.tagName)
+        ? [el.id, labelOf(el), /^(radio|checkbox)$/.test(el.type) ? el.getAttribute('value') : '']
+        : [(el.innerText || '').replace(/\\s+/g, ' ').trim().slice(0, 64)];
+    const key = [el.tagName, el.getAttribute('name'), el.getAttribute('type'), el.getAttribute('placeholder'),
+                 ...identity].join('|');
+    let hash = 0x811c9dc5;
+    for (let i = 0; i < key.length; i++) hash = Math.imul(hash ^ key.charCodeAt(i), 0x01000193);
+    return (hash >>> 0).toString(16);
+};
+const locate = el => [cssPath(el), fingerprint(el)];
+const resolve = (path, expected) => {
+    let el = null;
+    try { el = document.querySelector(path); } catch (e) {}
+    if (el && fingerprint(el) === expected) return el;
+    const tag = path.split(' > ').pop().split(':')[0];
+    if (!/^[a-z][a-z0-9-]*$/.test(tag)) return null;
+    for (const candidate of document.getElementsByTagName(tag)) {
+        if (fingerprint(candidate) === expected) return candidate;
+    }
+    return null;
+};
+"""
+
+# Keeps a page model alive inside the browser. The first call per document
+# installs a MutationObserver that bumps a version counter and marks sections
+# dirty only when headings, job cards, forms or visible text change. Later calls
+# return nothing when the caller's version is current, or just the dirty
+# sections otherwise, so rescanning an unchanged page is one cheap round trip.
+# Elements are returned as [css path, fingerprint] locators, never as live references.
+PAGE_MODEL_SCRIPT = NODE_LOCATOR_JS + """
+const jobSelector = arguments[0], applySelector = arguments[1], textLimit = arguments[2];
+const knownVersion = arguments[3], titleSelector = arguments[4];
+if (!document.body) return null;
+const SECTIONS = ['headings', 'jobs', 'forms', 'text'];
+const SECTION_SELECTORS = {
+    headings: 'h1, h2, h3, h4',
+    jobs: jobSelector + ', ' + applySelector,
+    forms: 'form, input, textarea, select'
+};
+const text = el => (el.innerText || '').trim();
+const touches = (node, selector) => {
+    if (!node || node.nodeType !== 1) return false;
+    return !!(node.closest(selector) || node.querySelector(selector));
+};
+
+let model = window.__agentPageModel;
+if (!model || model.url !== location.href) {
+    if (model && model.observer) model.observer.disconnect();
+    model = {url: location.href, version: 1, pulledVersion: null, dirty: new Set(SECTIONS)};
+    model.observer = new MutationObserver(records => {
+        let relevant = false;
+        for (const record of records) {
+            const target = record.target.nodeType === 1 ? record.target : record.target.parentElement;
+            if (!target || target.closest('script, style, noscript')) continue;
+            relevant = true;
+            model.dirty.add('text');
+            const nodes = [target, ...record.addedNodes, ...record.removedNodes];
+            for (const section of ['headings', 'jobs', 'forms']) {
+                if (nodes.some(n => touches(n, SECTION_SELECTORS[section]))) model.dirty.add(section);
+            }
+        }
+        if (relevant) model.version++;
+    });
+    model.observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    window.__agentPageModel = model;
+}
+
+const result = {url: model.url, version: model.version, full: false, sections: {}};
+if (knownVersion === model.version && model.pulledVersion === model.version) return result;
+if (knownVersion !== model.pulledVersion) {
+    result.full = true;
+    SECTIONS.forEach(s => model.dirty.add(s));
+}
+
+const isCareer = model.url.toLowerCase().includes('career');
+const collect = {
+    headings: () => {
+        const headings = [];
+        document.querySelectorAll('h1, h2, h3, h4').forEach(h => {
+            const t = text(h);
+            if (t) headings.push(t);
+        });
+        return {headings: headings};
+    },
+    jobs: () => {
+        const jobs = {page_type: isCareer ? 'career' : 'general', job_listings: [], buttons: []};
+        if (!isCareer) return jobs;
+        // Wrappers match the job selector too. A posting is the outermost match
+        // holding exactly one title (matches come in document order, ancestors
+        // first); without titled cards, fall back to the innermost matches.
+        const matches = Array.from(document.querySelectorAll(jobSelector));
+        const cards = new Map();
+        matches.forEach(el => {
+            const titles = el.querySelectorAll(titleSelector);
+            if (titles.length === 1 && !cards.has(titles[0])) cards.set(titles[0], el);
+        });
+        const postings = cards.size ? Array.from(cards.values())
+            : matches.filter(el => !matches.some(other => other !== el && el.contains(other)));
+        postings.forEach(job => {
+            const titleElem = job.querySelector(titleSelector);
+            const info = {
+                title: titleElem ? text(titleElem) : '',
+                description: text(job),
+                duration: '',
+                location: '',
+                locator: locate(job)
+            };
+            if (info.title || info.description.length > 20) jobs.job_listings.push(info);
+        });
+        document.querySelectorAll(applySelector).forEach(btn => {
+            jobs.buttons.push({text: text(btn), locator: locate(btn)});
+        });
+        return jobs;
+    },
+    forms: () => {
+        const forms = [];
+        document.querySelectorAll('form').forEach(form => {
+            const inputs = [];
+            form.querySelectorAll('input, textarea, select').forEach(inp => {
+                const choice = inp.type === 'radio' || inp.type === 'checkbox';
+                inputs.push({
+                    type: inp.type || null,
+                    name: inp.getAttribute('name'),
+                    placeholder: inp.getAttribute('placeholder'),
+                    label: labelOf(inp),
+                    id: inp.id || null,
+                    autocomplete: inp.getAttribute('autocomplete'),
+                    required: inp.required,
+                    options: inp.tagName === 'SELECT' ? Array.from(inp.options, o => o.text.trim())
+                        : choice ? [inp.value] : [],
+                    locator: locate(inp)
+                });
+            });
+            forms.push({inputs: inputs, locator: locate(form)});
+        });
+        return {forms: forms};
+    },
+    text: () => ({title: document.title, url: model.url, main_content: text(document.body).slice(0, textLimit)})
+};
+model.dirty.forEach(section => Object.assign(result.sections, collect[section]()));
+model.dirty.clear();
+model.pulledVersion = model.version;
+return result;
+"""
+
+# Finds the element behind a snapshot locator (see resolve() above)
+RESOLVE_LOCATOR_SCRIPT = NODE_LOCATOR_JS + """
+return resolve(arguments[0], arguments[1]);
+"""
+
+# Fills a whole form in one call from [css path, fingerprint, value] entries.
+# Values go through the native value setter so framework-managed inputs (React,
+# Vue) see them, then input, change and blur events fire as if typed. Selects
+# take the option whose text or value matches; radios and checkboxes are only
+# checked when they match. The filled elements are kept for FORM_VALIDATE_SCRIPT.
+FORM_FILL_SCRIPT = NODE_LOCATOR_JS + """
+const entries = arguments[0];
+const same = (a, b) => String(a).trim().toLowerCase() === String(b).trim().toLowerCase();
+const setValue = (el, value) => {
+    const descriptor = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value');
+    if (descriptor && descriptor.set) descriptor.set.call(el, value); else el.value = value;
+};
+const filled = [];
+const results = entries.map(([path, expected, value]) => {
+    const el = resolve(path, expected);
+    if (!el) return 'missing';
+    if (el.disabled || el.readOnly) return 'read_only';
+    if (el.type === 'radio' || el.type === 'checkbox') {
+        const wanted = value === true || same(el.value, value) || same(labelOf(el), value);
+        if (!wanted) return 'skipped';
+        el.checked = true;
+    } else if (el.tagName === 'SELECT') {
+        const text = String(value).toLowerCase();
+        const options = Array.from(el.options).filter(o => o.value && o.text.trim());
+        const option = options.find(o => same(o.value, value) || same(o.text, value)) ||
+            options.find(o => o.text.toLowerCase().includes(text) || text.includes(o.text.trim().toLowerCase()));
+        if (!option) return 'no_option';
+        setValue(el, option.value);
+    } else {
+        setValue(el, value);
+    }
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    el.dispatchEvent(new FocusEvent('blur'));
+    filled.push(el);
+    return 'filled';
+});
+window.__agentFilledFields = filled;
+return results;
+"""
+
+# Checks the fields FORM_FILL_SCRIPT filled (constraint validation plus
+# aria-invalid from the site's own validators) and lists required fields of the
+# same form that are still empty.
+FORM_VALIDATE_SCRIPT = NODE_LOCATOR_JS + """
+const filled = (window.__agentFilledFields || []).filter(el => el.isConnected);
+const invalid = el => !el.validity.valid || el.getAttribute('aria-invalid') === 'true';
+const describe = el => labelOf(el) || el.getAttribute('placeholder') || el.getAttribute('name') || el.type;
+const form = filled.length ? filled[0].form : null;
+const missing = [];
+if (form) {
+    const groups = new Set();
+    form.querySelectorAll('input, textarea, select').forEach(el => {
+        if (!el.required || filled.includes(el) || !invalid(el)) return;
+        if (el.type === 'radio' && (groups.has(el.name) || filled.some(f => f.name === el.name))) return;
+        if (el.type === 'radio') groups.add(el.name);
+        missing.push(describe(el));
+    });
+}
+return {
+    filled: filled.length,
+    invalid: filled.filter(invalid).map(el => [describe(el), el.validationMessage]),
+    missing: missing
+};
+"""
+
+# Polled by PageReadiness. Installs a tiny mutation counter once per document and
+# reports readyState, time since the last DOM mutation, time since the last
+# network resource finished (Resource Timing), a token identifying the document
+# (its time origin) and, optionally, whether a target element (CSS selector or
+# element reference) is visible in the viewport.
+READINESS_PROBE_SCRIPT = """
+const target = arguments[0];
+const now = performance.now();
+if (!window.__agentReadiness && document.documentElement) {
+    const state = {lastMutation: now};
+    new MutationObserver(() => { state.lastMutation = performance.now(); })
+        .observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    window.__agentReadiness = state;
+}
+const resources = performance.getEntriesByType('resource');
+const lastResource = resources.reduce((latest, r) => Math.max(latest, r.responseEnd), 0);
+let targetVisible = null;
+if (target) {
+    const el = typeof target === 'string' ? document.querySelector(target) : target;
+    targetVisible = false;
+    if (el && el.isConnected) {
+        const rect = el.getBoundingClientRect();
+        const style = getComputedStyle(el);
+        targetVisible = rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' &&
+            style.display !== 'none' && rect.bottom > 0 && rect.top < innerHeight;
+    }
+}
+return {
+    document: performance.timeOrigin,
+    ready_state: document.readyState,
+    ms_since_mutation: window.__agentReadiness ? now - window.__agentReadiness.lastMutation : 0,
+    ms_since_network: now - lastResource,
+    target_visible: targetVisible
+};
+"""
+
+ReadinessResult = namedtuple('ReadinessResult', ['signal', 'elapsed', 'ready_state'])
+
+class PageReadiness:
+    """Wait for a page to be usable on real signals instead of fixed sleeps
+    
+    Signals, checked on every poll:
+    - target_visible: the element we are about to use is rendered in the viewport
+    - dom_quiet: the document has loaded and the DOM stopped changing
+    - network_idle: the DOM is interactive and both the DOM and network are quiet
+      (covers pages whose load event is held back by slow third-party assets)
+    - ceiling: none of the above fired before the time limit
+    - interrupted: the turn waiting on the page was cancelled (see TurnScheduler)
+    
+    After a click that may load a new page, pass the probe from mark() taken before
+    the click as since=: the old document, still complete and quiet, does not count
+    as ready; only a new document or a target that has appeared since does.
+    """
+    
+    def __init__(self, driver, poll_interval=0.05, quiet_ms=300, network_idle_ms=500, interrupted=None):
+        self.driver = driver
+        self.poll_interval = poll_interval
+        self.quiet_ms = quiet_ms
+        self.network_idle_ms = network_idle_ms
+        self.interrupted = interrupted or (lambda: False)
+    
+    def mark(self, target=None):
+        """Probe of the current document, taken before an action that may replace it"""
+        try:
+            return self.driver.execute_script(READINESS_PROBE_SCRIPT, target)
+        except Exception:
+            return None
+    
+    def wait(self, target=None, ceiling=5.0, since=None):
+        """Block until the page is ready or the ceiling is hit; return which signal fired"""
+        started = time.monotonic()
+        ready_state = 'unknown'
+        while True:
+            try:
+                probe = self.driver.execute_script(READINESS_PROBE_SCRIPT, target)
+            except Exception:
+                probe = None  # Document is being replaced mid-navigation
+            
+            if probe:
+                ready_state = probe['ready_state']
+                if since and probe.get('document') == since.get('document'):
+                    # Still the document the action started on
+                    signal = 'target_visible' if probe['target_visible'] and not since['target_visible'] else None
+                else:
+                    signal = self.check(probe)
+                if signal:
+                    return self.report(signal, started, ready_state)
+            
+            if time.monotonic() - started >= ceiling:
+                return self.report('ceiling', started, ready_state)
+            if self.interrupted():
+                return self.report('interrupted', started, ready_state)
+            time.sleep(self.poll_interval)
+    
+    def check(self, probe):
+        """Return the name of the first readiness signal satisfied by a probe result"""
+        if probe['ready_state'] == 'loading':
+            return None
+        if probe['target_visible']:
+            return 'target_visible'
+        dom_quiet = probe['ms_since_mutation'] >= self.quiet_ms
+        if probe['ready_state'] == 'complete' and dom_quiet:
+            return 'dom_quiet'
+        if dom_quiet and probe['ms_since_network'] >= self.network_idle_ms:
+            return 'network_idle'
+        return None
+    
+    def report(self, signal, started, ready_state):
+        result = ReadinessResult(signal, time.monotonic() - started, ready_state)
+        print(f"⏱️ Page ready via {result.signal} in {result.elapsed:.2f}s (readyState: {result.ready_state})")
+        return result
+
+def normalize_url(url):
+    """Canonical form of a URL for use as a store key (no fragment, no trailing slash)"""
+    url, _ = urldefrag(url)
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/') or '/'
+    return f"{parsed.scheme}://{parsed.netloc.lower()}{path}" + (f"?{parsed.query}" if parsed.query else "")
+
+# Typed page snapshot. Every field is an immutable tuple or string, so a snapshot
+# can be hashed, compared, pickled, shared between threads and stored as JSON.
+# Page elements are referenced by Locator (CSS path plus node fingerprint) and
+# only turned into a WebElement by resolve_locator() when an action needs one.
+Locator = namedtuple('Locator', ['css', 'fingerprint'])
+JobPosting = namedtuple('JobPosting', ['title', 'description', 'duration', 'location', 'locator'])
+Button = namedtuple('Button', ['text', 'locator'])
+FormField = namedtuple('FormField', ['type', 'name', 'placeholder', 'locator', 'label', 'id', 'autocomplete',
+                                     'required', 'options'], defaults=('', None, None, False, ()))
+Form = namedtuple('Form', ['inputs', 'locator'])
+PageSnapshot = namedtuple('PageSnapshot', ['url', 'title', 'page_type', 'headings', 'job_listings',
+                                           'buttons', 'forms', 'main_content'])
+EMPTY_SNAPSHOT = PageSnapshot('', '', 'general', (), (), (), (), '')
+
+def as_locator(value):
+    return Locator(*value) if value else None
+
+def snapshot_fields(data):
+    """Typed PageSnapshot fields for the keys present in a plain dict (browser sections or stored JSON)"""
+    fields = {key: data[key] or '' for key in ('url', 'title', 'main_content') if key in data}
+    if 'page_type' in data:
+        fields['page_type'] = data['page_type'] or 'general'
+    if 'headings' in data:
+        fields['headings'] = tuple(data['headings'])
+    if 'job_listings' in data:
+        fields['job_listings'] = normalize_job_listings(
+            JobPosting(job.get('title') or '', job.get('description') or '', job.get('duration') or '',
+                       job.get('location') or '', as_locator(job.get('locator')))
+            for job in data['job_listings'])
+    if 'buttons' in data:
+        fields['buttons'] = tuple(Button(button.get('text') or '', as_locator(button.get('locator')))
+                                  for button in data['buttons'])
+    if 'forms' in data:
+        fields['forms'] = tuple(
+            Form(tuple(FormField(inp.get('type'), inp.get('name'), inp.get('placeholder'),
+                                 as_locator(inp.get('locator')), inp.get('label') or '', inp.get('id'),
+                                 inp.get('autocomplete'), bool(inp.get('required')), tuple(inp.get('options') or ()))
+                       for inp in form.get('inputs', [])),
+                 as_locator(form.get('locator')))
+            for form in data['forms'])
+    return fields
+
+def snapshot_from_dict(data):
+    return EMPTY_SNAPSHOT._replace(**snapshot_fields(data))
+
+def snapshot_to_dict(snapshot):
+    """JSON-ready form of a snapshot; snapshot_from_dict() reverses it"""
+    data = snapshot._asdict()
+    data['job_listings'] = [job._asdict() for job in snapshot.job_listings]
+    data['buttons'] = [button._asdict() for button in snapshot.buttons]
+    data['forms'] = [{'inputs': [inp._asdict() for inp in form.inputs], 'locator': form.locator}
+                     for form in snapshot.forms]
+    return data
+
+def resolve_locator(driver, locator):
+    """Live WebElement for a snapshot locator, or None if the node is gone"""
+    if locator is None:
+        return None
+    return driver.execute_script(RESOLVE_LOCATOR_SCRIPT, locator.css, locator.fingerprint)
+
+def job_cards_from_soup(soup):
+    """One element per job posting, skipping nested wrappers (same rule as PAGE_MODEL_SCRIPT)"""
+    matches = soup.select(JOB_SELECTOR)
+    cards = {}
+    for el in matches:
+        titles = el.select(JOB_TITLE_SELECTOR)
+        if len(titles) == 1:
+            cards.setdefault(id(titles[0]), el)
+    if cards:
+        return list(cards.values())
+    return [el for el in matches if not any(other is not el and el in other.parents for other in matches)]
+
+DURATION_PATTERN = re.compile(r'\b(\d+(?:\s*(?:-|to)\s*\d+)?)\s*(day|week|month|year)s?\b', re.I)
+LOCATION_PATTERN = re.compile(r'\blocation\s*[:\-]\s*([a-z][a-z ,/-]{1,40}?)\s*(?:[.;|()\n]|$)', re.I)
+WORK_MODE_PATTERN = re.compile(r'\b(remote|hybrid|on-?site|work from home)\b', re.I)
+
+def normalize_job(job):
+    """Collapse whitespace and pull duration/location out of the card text into fields"""
+    title = ' '.join(job.title.split())
+    description = ' '.join(job.description.split())
+    duration, location = job.duration, job.location
+    if not duration:
+        match = DURATION_PATTERN.search(description)
+        if match:
+            amount = re.sub(r'\s*(?:-|to)\s*', '-', match.group(1))
+            duration = f"{amount} {match.group(2).lower()}" + ('' if amount == '1' else 's')
+    if not location:
+        match = LOCATION_PATTERN.search(description) or WORK_MODE_PATTERN.search(description)
+        if match:
+            location = match.group(1).strip(' ,-').title()
+    return job._replace(title=title, description=description, duration=duration, location=location)
+
+def normalize_job_listings(listings):
+    """Normalized listings with exact duplicates (same title and text) dropped, order kept"""
+    seen = set()
+    unique = []
+    for job in map(normalize_job, listings):
+        key = (job.title.lower(), job.description.lower())
+        if key not in seen:
+            seen.add(key)
+            unique.append(job)
+    return tuple(unique)
+
+class JobIndex:
+    """Ranked fuzzy lookup over the job titles of one page snapshot
+    
+    Query words match whole title words, so 'ai' never matches 'email' or
+    'maintain'; words of four or more letters also match by character-trigram
+    overlap to absorb misrecognized speech ('develper'). Description words
+    only break ties.
+    """
+    
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    IGNORED = frozenset("a an the for to of in job jobs position positions role opening post apply".split())
+    MIN_FUZZY_LENGTH = 4
+    MIN_SIMILARITY = 0.45
+    
+    def __init__(self, listings):
+        self.listings = listings
+        self.title_tokens = []
+        self.description_tokens = []
+        self.postings = {}  # title token -> indexes of jobs whose title has it
+        self.trigram_tokens = {}  # trigram -> title tokens containing it
+        for i, job in enumerate(listings):
+            tokens = set(self.tokenize(job.title))
+            self.title_tokens.append(tokens)
+            self.description_tokens.append(set(self.tokenize(job.description)))
+            for token in tokens:
+                self.postings.setdefault(token, set()).add(i)
+                for gram in self.trigrams(token):
+                    self.trigram_tokens.setdefault(gram, set()).add(token)
+    
+    def tokenize(self, text):
+        return self.TOKEN_PATTERN.findall(text.lower())
+    
+    @staticmethod
+    def trigrams(token):
+        padded = f" {token} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def similar_tokens(self, word):
+        """Title tokens equal to word, or close to it by trigram Jaccard similarity"""
+        if word in self.postings:
+            return {word: 1.0}
+        if len(word) < self.MIN_FUZZY_LENGTH:
+            return {}
+        grams = self.trigrams(word)
+        candidates = set().union(*(self.trigram_tokens.get(g, ()) for g in grams))
+        matches = {}
+        for token in candidates:
+            other = self.trigrams(token)
+            similarity = len(grams & other) / len(grams | other)
+            if similarity >= self.MIN_SIMILARITY:
+                matches[token] = similarity
+        return matches
+    
+    def search(self, query, limit=5):
+        """[(score, job)] best first; score is the share of query words found in the title"""
+        words = [w for w in self.tokenize(query) if w not in self.IGNORED]
+        if not words:
+            return []
+        scores = {}
+        for word in words:
+            for token, similarity in self.similar_tokens(word).items():
+                for i in self.postings[token]:
+                    scores[i] = scores.get(i, 0.0) + similarity
+            for i, tokens in enumerate(self.description_tokens):
+                if word in tokens:
+                    scores[i] = scores.get(i, 0.0) + 0.1
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], len(self.title_tokens[item[0]]), item[0]))
+        return [(score / len(words), self.listings[i]) for i, score in ranked[:limit]]
+    
+    def best(self, query):
+        results = self.search(query, limit=1)
+        return results[0][1] if results else None
+
+FieldMatch = namedtuple('FieldMatch', ['field', 'key', 'value', 'score'])
+
+class FormMapper:
+    """Maps application form fields to applicant profile entries
+    
+    Each field is scored against every profile key: an autocomplete token is
+    decisive, then the field's name or id, its label, its placeholder and last
+    its input type. A whole-word alias match beats a partial one, and longer
+    aliases win ties. A field only matched partially is left empty when another
+    key's aliases cover other words of it ('Company website' is neither the
+    company nor the applicant's own website). Each key fills one field, except
+    for the radio buttons of one group.
+    """
+    
+    ALIASES = {
+        'first_name': ('first name', 'fname', 'given name', 'forename'),
+        'last_name': ('last name', 'lname', 'surname', 'family name'),
+        'full_name': ('full name', 'name', 'your name', 'applicant name', 'candidate name'),
+        'email': ('email', 'e mail', 'email address', 'mail'),
+        'phone': ('phone', 'phone number', 'mobile', 'mobile number', 'contact number', 'telephone', 'tel',
+                  'whatsapp'),
+        'city': ('city', 'location', 'current location', 'current city'),
+        'address': ('address', 'street address'),
+        'linkedin': ('linkedin', 'linkedin profile', 'linkedin url'),
+        'portfolio': ('portfolio', 'website', 'github', 'portfolio url', 'personal website'),
+        'experience': ('experience', 'years of experience', 'total experience', 'work experience'),
+        'current_company': ('current company', 'company', 'company name', 'current employer', 'organization',
+                            'organisation'),
+        'current_ctc': ('current ctc', 'current salary'),
+        'expected_ctc': ('expected ctc', 'expected salary', 'salary expectation'),
+        'notice_period': ('notice period', 'notice', 'availability', 'joining date'),
+        'qualification': ('qualification', 'highest qualification', 'education', 'degree'),
+        'college': ('college', 'university', 'institute'),
+        'skills': ('skills', 'key skills', 'technical skills'),
+        'gender': ('gender', 'sex'),
+        'position': ('position', 'role', 'job', 'job title', 'applying for', 'post applied for'),
+        'cover_letter': ('cover letter', 'message', 'about you', 'about yourself', 'why', 'comments',
+                         'additional information'),
+        'consent': ('consent', 'agree', 'i agree', 'terms', 'privacy policy'),
+    }
+    AUTOCOMPLETE = {'given-name': 'first_name', 'family-name': 'last_name', 'name': 'full_name',
+                    'email': 'email', 'tel': 'phone', 'tel-national': 'phone', 'address-level2': 'city',
+                    'street-address': 'address', 'url': 'portfolio', 'organization': 'current_company'}
+    TYPES = {'email': 'email', 'tel': 'phone', 'url': 'portfolio'}
+    SKIPPED_TYPES = frozenset(['hidden', 'submit', 'button', 'reset', 'image', 'password', 'search', 'file'])
+    OTHER_PERSON = frozenset(['father', 'mother', 'parent', 'spouse', 'guardian', 'reference', 'referee',
+                              'emergency', 'referral', 'manager'])  # Fields about someone else
+    SOURCES = (('name', 1.0), ('id', 1.0), ('label', 0.95), ('placeholder', 0.85))
+    MIN_SCORE = 0.6
+    
+    def __init__(self, profile):
+        profile = dict(profile)
+        if 'name' in profile and 'full_name' not in profile:
+            profile['full_name'] = profile.pop('name')
+        names = str(profile.get('full_name', '')).split()
+        if names:
+            profile.setdefault('first_name', names[0])
+            if len(names) > 1:
+                profile.setdefault('last_name', ' '.join(names[1:]))
+        elif 'first_name' in profile:
+            profile['full_name'] = f"{profile['first_name']} {profile.get('last_name', '')}".strip()
+        self.profile = profile
+        self.aliases = {}  # key -> alias word tuples, for the profile's own keys too
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def words(text):
+        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text or '')
+        return tuple(re.findall(r'[a-z0-9]+', text.lower()))
+    
+    def alias_words(self, key):
+        if key not in self.aliases:
+            aliases = self.ALIASES.get(key, ()) + (key.replace('_', ' '),)
+            self.aliases[key] = list(dict.fromkeys(self.words(alias) for alias in aliases))
+        return self.aliases[key]
+    
+    def match(self, field, key):
+        """(score, partial, covered) for how well a profile key fits a form field
+        
+        The score is 0 when it does not fit. partial is True when the score comes
+        from an alias inside longer text; covered holds the field words the key's
+        aliases matched.
+        """
+        if field.autocomplete and self.AUTOCOMPLETE.get(field.autocomplete.split()[-1]) == key:
+            return 1.1, False, frozenset()
+        best = 0.7 if self.TYPES.get(field.type) == key else 0.0
+        partial = False
+        covered = set()
+        for source, weight in self.SOURCES:
+            words = self.words(getattr(field, source))
+            if not words:
+                continue
+            for alias in self.alias_words(key):
+                if alias == words:
+                    covered.update(alias)
+                    if weight > best:
+                        best, partial = weight, False
+                elif any(words[i:i + len(alias)] == alias for i in range(len(words) - len(alias) + 1)):
+                    covered.update(alias)
+                    if weight * 0.8 + len(' '.join(alias)) / 1000 > best:
+                        best, partial = weight * 0.8 + len(' '.join(alias)) / 1000, True
+        return best, partial, frozenset(covered)
+    
+    def plan(self, form, extra=None):
+        """[FieldMatch] in form order for the fields the profile (plus extra values) can fill"""
+        values = dict(self.profile, **(extra or {}))
+        candidates = []
+        for field in form.inputs:
+            if (field.type or '') in self.SKIPPED_TYPES or field.locator is None:
+                continue
+            if self.OTHER_PERSON.intersection(self.words(field.name) + self.words(field.label)):
+                continue
+            matches = {}
+            for key in values:
+                score, partial, covered = self.match(field, key)
+                if score >= self.MIN_SCORE:
+                    matches[key] = (score, partial, covered)
+            if not matches:
+                continue
+            top = max(matches, key=lambda k: matches[k][0])
+            _, partial, covered = matches[top]
+            if partial and any(not other <= covered for key, (_, _, other) in matches.items() if key != top):
+                continue  # Two keys each name part of it; better left empty than wrong
+            for key, (score, _, _) in matches.items():
+                value = values[key]
+                candidates.append(FieldMatch(field, key, value if isinstance(value, bool) else str(value), score))
+        
+        # Best matches claim their field and key first
+        taken_fields, taken_keys = set(), {}
+        chosen = []
+        for match in sorted(candidates, key=lambda m: -m.score):
+            group = match.field.name if match.field.type == 'radio' else match.field.locator
+            if match.field.locator in taken_fields or taken_keys.get(match.key, group) != group:
+                continue
+            taken_fields.add(match.field.locator)
+            taken_keys[match.key] = group
+            chosen.append(match)
+        order = {field.locator: i for i, field in enumerate(form.inputs)}
+        return sorted(chosen, key=lambda m: order[m.field.locator])
+    
+    def best_plan(self, forms, extra=None):
+        """Plan for whichever form on the page the profile fills most of"""
+        return max((self.plan(form, extra) for form in forms), key=len, default=[])
+
+def page_content_from_soup(soup, url, text_limit=MAIN_CONTENT_LIMIT):
+    """Build a PageSnapshot from parsed HTML, like the live browser snapshot minus locators"""
+    for tag in soup(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    text = lambda el: ' '.join(el.get_text(' ', strip=True).split())
+    
+    content = {
+        'title': soup.title.get_text(strip=True) if soup.title else '',
+        'url': url,
+        'headings': [t for t in (text(h) for h in soup.select('h1, h2, h3, h4')) if t],
+        'job_listings': [],
+        'forms': [],
+        'buttons': [],
+        'main_content': text(soup.body or soup)[:text_limit],
+        'page_type': 'general'
+    }
+    
+    if 'career' in url.lower():
+        content['page_type'] = 'career'
+        for job in job_cards_from_soup(soup):
+            title_elem = job.select_one(JOB_TITLE_SELECTOR)
+            job_info = {
+                'title': text(title_elem) if title_elem else '',
+                'description': text(job),
+                'duration': '',
+                'location': ''
+            }
+            if job_info['title'] or len(job_info['description']) > 20:
+                content['job_listings'].append(job_info)
+        content['buttons'] = [{'text': text(btn)} for btn in soup.select(APPLY_BUTTON_SELECTOR)]
+    
+    for form in soup.find_all('form'):
+        content['forms'].append({'inputs': [
+            {'type': inp.get('type') or ('text' if inp.name == 'input' else inp.name),
+             'name': inp.get('name'), 'placeholder': inp.get('placeholder')}
+            for inp in form.select('input, textarea, select')
+        ]})
+    return snapshot_from_dict(content)
+
+def nav_anchors_from_soup(soup, base_url):
+    """(link text, URL) for the same-site links in the nav, header and footer of a page"""
+    host = urlparse(base_url).netloc.lower()
+    anchors = []
+    for anchor in soup.select('nav a[href], header a[href], footer a[href]'):
+        url = normalize_url(urljoin(base_url, anchor['href']))
+        parsed = urlparse(url)
+        if parsed.scheme in ('http', 'https') and parsed.netloc == host:
+            text = anchor.get_text(' ', strip=True) or anchor.get('aria-label') or anchor.get('title') or ''
+            anchors.append((text, url))
+    return anchors
+
+class SnapshotStore:
+    """On-disk store of extracted page snapshots plus their HTTP validators, keyed by URL"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def path_for(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest()[:20] + '.json')
+    
+    def get(self, url):
+        try:
+            with open(self.path_for(normalize_url(url)), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def put(self, url, entry):
+        path = self.path_for(normalize_url(url))
+        with self.lock:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+
+class SiteCrawler:
+    """Background crawler that keeps snapshots of the whole site fresh over plain HTTP
+    
+    Seeds are the home page and known page URLs, then the sitemap and nav/footer
+    links. Pages are revalidated with ETag / Last-Modified so unchanged pages cost
+    a 304. Pages that load are recorded in verified (with any redirect applied) and
+    their nav anchors in anchors; on_update is called as those fill in.
+    """
+    
+    def __init__(self, base_url, seed_urls, store, max_pages=40, refresh_interval=900.0, on_update=None):
+        self.base_url = base_url
+        self.seed_urls = list(dict.fromkeys(normalize_url(url) for url in seed_urls))
+        self.store = store
+        self.max_pages = max_pages
+        self.refresh_interval = refresh_interval
+        self.on_update = on_update
+        self.verified = {}  # Requested URL -> final URL, for pages that loaded
+        self.anchors = {}  # Page URL -> [(link text, URL)] from its nav, header and footer
+        self.sitemap = []
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0 (AI Voice Web Agent snapshot crawler)"})
+        self._thread = None
+    
+    def start(self):
+        """Crawl in a daemon thread, repeating every refresh_interval seconds"""
+        if self._thread:
+            return
+        
+        def crawl_loop():
+            while True:
+                try:
+                    self.crawl_once()
+                except Exception as e:
+                    logger.warning(f"Site crawl failed: {e}")
+                time.sleep(self.refresh_interval)
+        
+        self._thread = threading.Thread(target=crawl_loop, daemon=True)
+        self._thread.start()
+    
+    def crawl_once(self):
+        """Fetch or revalidate every reachable page once; return the number of pages visited"""
+        self.sitemap = self.sitemap_urls()
+        queue = deque(self.seed_urls + self.sitemap)
+        seen = set()
+        last_update = time.monotonic()
+        while queue and len(seen) < self.max_pages:
+            url = queue.popleft()
+            if url in seen:
+                continue
+            seen.add(url)
+            for link in self.fetch(url):
+                if link not in seen:
+                    queue.append(link)
+            # Let consumers use what is verified so far instead of waiting for the whole crawl
+            if self.on_update and time.monotonic() - last_update >= 1.0:
+                self.on_update()
+                last_update = time.monotonic()
+        logger.info(f"Site crawl finished: {len(seen)} pages checked")
+        if self.on_update:
+            self.on_update()
+        return len(seen)
+    
+    def sitemap_urls(self):
+        try:
+            response = self.session.get(urljoin(self.base_url, '/sitemap.xml'), timeout=(3, 10))
+            if response.status_code != 200:
+                return []
+            host = urlparse(self.base_url).netloc.lower()
+            locs = re.findall(r'<loc>\s*([^<\s]+)\s*</loc>', response.text)
+            return [normalize_url(loc) for loc in locs if urlparse(loc).netloc.lower() == host]
+        except requests.RequestException:
+            return []
+    
+    def fetch(self, url):
+        """Fetch one page (conditionally if we have it already); return its site links"""
+        entry = self.store.get(url)
+        headers = {}
+        if entry and 'anchors' in entry:  # Entries from before anchors were stored are refetched
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        
+        try:
+            response = self.session.get(url, headers=headers, timeout=(3, 10))
+        except requests.RequestException as e:
+            logger.debug(f"Crawl fetch failed for {url}: {e}")
+            return []
+        
+        if response.status_code == 304 and entry:
+            entry['checked_at'] = time.time()
+            self.store.put(url, entry)
+            self.verified[url] = entry.get('final_url', url)
+            self.anchors[url] = [tuple(anchor) for anchor in entry['anchors']]
+            return entry.get('links', [])
+        
+        if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', ''):
+            self.verified.pop(url, None)
+            self.anchors.pop(url, None)
+            return []
+        
+        soup = BeautifulSoup(response.text, 'html.parser')
+        anchors = nav_anchors_from_soup(soup, response.url)
+        links = list(dict.fromkeys(link for _, link in anchors))
+        final_url = normalize_url(response.url)
+        self.store.put(url, {
+            'url': url,
+            'final_url': final_url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': time.time(),
+            'links': links,
+            'anchors': anchors,
+            'content': snapshot_to_dict(page_content_from_soup(soup, url))
+        })
+        self.verified[url] = final_url
+        self.anchors[url] = anchors
+        return links
+    
+    def lookup(self, url):
+        """Stored PageSnapshot for a URL, or None if it has not been crawled yet"""
+        entry = self.store.get(url)
+        return snapshot_from_dict(entry['content']) if entry else None
+
+# Other names visitors use for pages most sites have. A page the site links under
+# any one of these names is indexed under all of them, so each must still name the
+# page once normalized ("main page" would index "main", "our work" just "work").
+NAV_SYNONYMS = {
+    'home': ['home', 'homepage', 'home page'],
+    'about': ['about', 'about us', 'who we are'],
+    'services': ['services', 'service', 'what we do', 'offerings', 'solutions'],
+    'career': ['career', 'careers', 'jobs', 'job openings', 'openings', 'hiring', 'join us',
+               'work with us', 'vacancies'],
+    'contact': ['contact', 'contact us', 'get in touch', 'reach us'],
+    'portfolio': ['portfolio', 'projects', 'case studies'],
+    'blog': ['blog', 'news', 'articles', 'insights'],
+    'team': ['team', 'our team', 'leadership'],
+}
+
+class NavigationIndex:
+    """Spoken page names mapped to URLs the site really serves
+    
+    Names come from the site's own nav/header/footer link text, URL slugs of
+    crawled and sitemap pages, and NAV_SYNONYMS. Only URLs the crawler loaded are
+    indexed, so navigating never spends a round trip on a 404. A normalized name
+    is one dict lookup; anything else falls back to the known names contained in
+    the phrase (most words, then latest, wins), then to character-trigram similarity.
+    """
+    
+    FILLER = frozenset("the a an our your page section".split())
+    MAX_NAME_WORDS = 4
+    MIN_SIMILARITY = 0.5
+    
+    def __init__(self, phrases=None, built_at=None):
+        self.phrases = dict(phrases or {})  # Normalized name -> URL
+        self.built_at = built_at
+        self.trigram_phrases = {}  # Trigram -> names containing it
+        for phrase in self.phrases:
+            for gram in JobIndex.trigrams(phrase):
+                self.trigram_phrases.setdefault(gram, set()).add(phrase)
+        names = '|'.join(re.escape(p) for p in sorted(self.phrases, key=len, reverse=True))
+        self.pattern = re.compile(rf"\b(?:{names})\b") if names else None
+    
+    @classmethod
+    def normalize(cls, text):
+        return ' '.join(w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in cls.FILLER)
+    
+    @classmethod
+    def build(cls, home_url, verified, anchors, sitemap_urls=()):
+        """Index from crawl results: verified maps requested to final URL, anchors are (text, URL)"""
+        phrases = {}
+        
+        def add(name, url):
+            phrase = cls.normalize(name)
+            if phrase and len(phrase.split()) <= cls.MAX_NAME_WORDS:
+                phrases.setdefault(phrase, url)  # Earlier sources (nav link text) win
+        
+        home = normalize_url(home_url)
+        if home in verified:
+            add('home', verified[home])
+        for text, url in anchors:
+            if url in verified:
+                add(text, verified[url])
+        for url in list(verified) + list(sitemap_urls):
+            if url in verified:
+                slug = urlparse(url).path.rstrip('/').rsplit('/', 1)[-1]
+                add(re.sub(r'\.[a-z]+$', '', slug), verified[url])  # about-us.html -> "about us"
+        for names in NAV_SYNONYMS.values():
+            url = next((phrases[p] for p in map(cls.normalize, names) if p in phrases), None)
+            if url:
+                for name in names:
+                    add(name, url)
+        return cls(phrases, time.time())
+    
+    def resolve(self, name):
+        """Verified URL for a spoken page name, or None"""
+        phrase = self.normalize(name)
+        if phrase in self.phrases:
+            return self.phrases[phrase]
+        match = self.closest(phrase)
+        return self.phrases[match] if match else None
+    
+    def closest(self, phrase):
+        """Indexed name a normalized phrase most likely means, or None"""
+        grams = JobIndex.trigrams(phrase)
+        candidates = set().union(*(self.trigram_phrases.get(g, ()) for g in grams))
+        # Known names inside a longer phrase ("careers at your company"). The name covering
+        # most words wins, then the one said last: "more about the team" means the team
+        contained = []
+        for candidate in candidates:
+            match = re.search(rf"\b{re.escape(candidate)}\b", phrase)
+            if match:
+                contained.append((len(candidate.split()), match.end(), candidate))
+        if contained:
+            return max(contained)[2]
+        # Otherwise the most similar name ("carreers")
+        best, best_similarity = None, self.MIN_SIMILARITY
+        for candidate in sorted(candidates):
+            other = JobIndex.trigrams(candidate)
+            similarity = len(grams & other) / len(grams | other)
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        return best
+    
+    def mentioned(self, text):
+        """(name, URL) for every indexed page name that occurs in text"""
+        if not self.pattern:
+            return []
+        return [(m.group(0), self.phrases[m.group(0)]) for m in self.pattern.finditer(self.normalize(text))]
+    
+    def spoken_names(self):
+        """Every name worth recognizing in speech, whether or not this site has the page"""
+        names = [self.normalize(n) for synonyms in NAV_SYNONYMS.values() for n in synonyms]
+        return list(dict.fromkeys(names + list(self.phrases)))
+    
+    def page_names(self):
+        """One name per indexed page (the first found, usually its nav link text)"""
+        names = {}
+        for phrase, url in self.phrases.items():
+            names.setdefault(url, phrase)
+        return list(names.values())
+    
+    def urls(self):
+        return list(dict.fromkeys(self.phrases.values()))
+    
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data['phrases'], data.get('built_at'))
+        except (OSError, ValueError, KeyError):
+            return cls()
+    
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'built_at': self.built_at, 'phrases': self.phrases}, f, indent=1)
+        os.replace(tmp_path, path)
+
+def load_website_context(website_url, config_dir=SITE_CONFIG_DIR):
+    """Facts about a site for prompts and intents: sites/<host>.json, else generic defaults"""
+    host = urlparse(website_url).netloc.lower()
+    bare_host = host[4:] if host.startswith('www.') else host
+    context = {
+        'company_name': bare_host,
+        'website_url': website_url,
+        'available_pages': [],  # Filled in from the navigation index
+        'main_services': [],
+        'job_keywords': list(DEFAULT_JOB_KEYWORDS),
+    }
+    for name in dict.fromkeys([host, bare_host]):
+        path = os.path.join(config_dir, f"{name}.json")
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, encoding='utf-8') as f:
+                context.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read site config {path}: {e}")
+        break
+    return context
+
+def load_applicant_profile(path):
+    """Applicant details for application forms (flat JSON object), or {} when there are none"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return {key: value for key, value in json.load(f).items() if value not in (None, '')}
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"⚠️ Could not read applicant profile {path}: {e}")
+        return {}
+
+def estimate_tokens(text):
+    """Rough token count for prompt budgeting (~4 characters per token for English)"""
+    return (len(text) + 3) // 4
+
+class ContextRetriever:
+    """BM25 retrieval over page text chunks and job listings
+    
+    Each page snapshot is chunked and indexed once; per query, scoring is a single
+    vectorized NumPy reduction over the precomputed BM25 weight matrix.
+    """
+    
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    STOPWORDS = frozenset(
+        "a an and are as at be by can do does for from have how i in is it me my of on or "
+        "our the this to us we what when where which who why will with you your".split())
+    
+    def __init__(self, chunk_words=60, overlap_words=15, k1=1.5, b=0.75, top_k=6, max_indexes=8):
+        self.chunk_words = chunk_words
+        self.overlap_words = overlap_words
+        self.k1 = k1
+        self.b = b
+        self.top_k = top_k
+        self.max_indexes = max_indexes
+        self._indexes = OrderedDict()  # snapshot -> index, most recently used last
+    
+    def tokenize(self, text):
+        return [t for t in self.TOKEN_PATTERN.findall(text.lower()) if t not in self.STOPWORDS]
+    
+    def chunk(self, content):
+        """Split a page snapshot into retrievable passages (one per job, windows over the body text)"""
+        chunks = []
+        for job in content.job_listings:
+            description = job.description
+            if job.title and not description.startswith(job.title):
+                description = f"{job.title}: {description}"
+            chunks.append(f"JOB - {description}")
+        
+        words = content.main_content.split()
+        step = self.chunk_words - self.overlap_words
+        for start in range(0, len(words), step):
+            chunks.append(' '.join(words[start:start + self.chunk_words]))
+            if start + self.chunk_words >= len(words):
+                break
+        return chunks
+    
+    def index(self, content):
+        """Build (or reuse) the BM25 index for a snapshot"""
+        index = self._indexes.get(content)
+        if index is not None:
+            self._indexes.move_to_end(content)
+            return index
+        
+        chunks = self.chunk(content)
+        tokenized = [self.tokenize(c) for c in chunks]
+        vocabulary = {}
+        for tokens in tokenized:
+            for token in tokens:
+                vocabulary.setdefault(token, len(vocabulary))
+        
+        tf = np.zeros((len(chunks), max(len(vocabulary), 1)), dtype=np.float32)
+        for row, tokens in enumerate(tokenized):
+            for token in tokens:
+                tf[row, vocabulary[token]] += 1
+        
+        lengths = tf.sum(axis=1)
+        avg_length = lengths.mean() if len(chunks) else 1.0
+        doc_freq = (tf > 0).sum(axis=0)
+        idf = np.log(1 + (len(chunks) - doc_freq + 0.5) / (doc_freq + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(avg_length, 1e-6))
+        weights = idf * (tf * (self.k1 + 1)) / (tf + norm[:, None])
+        
+        index = {'chunks': chunks, 'vocabulary': vocabulary, 'weights': weights.astype(np.float32)}
+        self._indexes[content] = index
+        if len(self._indexes) > self.max_indexes:
+            self._indexes.popitem(last=False)
+        return index
+    
+    def select(self, content, query, token_budget=400):
+        """Up to top_k best-scoring chunks for the query that fit the token budget, in page order"""
+        index = self.index(content)
+        chunks = index['chunks']
+        if not chunks:
+            return []
+        
+        columns = [index['vocabulary'][t] for t in set(self.tokenize(query)) if t in index['vocabulary']]
+        if columns:
+            scores = index['weights'][:, columns].sum(axis=1)
+            ranked = [int(i) for i in np.argsort(-scores, kind='stable') if scores[i] > 0]
+        else:
+            ranked = []
+        # Fall back to the top of the page when nothing matches the query
+        matched = set(ranked)
+        ranked += [i for i in range(len(chunks)) if i not in matched]
+        
+        selected = []
+        used = 0
+        for i in ranked:
+            cost = estimate_tokens(chunks[i])
+            if used + cost > token_budget:
+                continue
+            selected.append(i)
+            used += cost
+            if len(selected) >= self.top_k:
+                break
+        return [chunks[i] for i in sorted(selected)]
+
+class PromptBuilder:
+    """Token-budgeted chat prompt builder
+    
+    The first system message holds only the instructions, which never change
+    between turns, so providers can cache that prefix. Everything per-turn goes
+    into a second, compactly serialized message: page details, retrieved page
+    passages, other pages, a rolling summary of older turns and the last few
+    turns verbatim. Page passages get whatever budget is left after the rest.
+    """
+    
+    def __init__(self, website_context, retriever, token_budget=1400, recent_turns=3,
+                 history_budget=300, summary_budget=150, related_pages_budget=200, jobs_budget=250):
+        self.retriever = retriever
+        self.token_budget = token_budget
+        self.jobs_budget = jobs_budget
+        self.recent_turns = recent_turns
+        self.history_budget = history_budget
+        self.summary_budget = summary_budget
+        self.related_pages_budget = related_pages_budget
+        self.turn_tokens = []  # Prompt tokens sent per turn, for reporting
+        self.instructions = f"""You are an intelligent voice assistant for the {website_context['company_name']} website.
+
+ENHANCED CAPABILITIES:
+- Answer questions about company, services, jobs with specific details from current page
+- Navigate to different pages intelligently
+- Help with job applications by finding specific jobs and application forms
+- Remember conversation context and refer to previous discussions
+- Extract and provide specific information from current page content
+
+IMPORTANT INSTRUCTIONS:
+1. If user asks about specific jobs (like "AI LLM intern"), provide details from the job listings in the page content
+2. If user wants to apply for a job, guide them to the specific application process
+3. Remember what we discussed before - refer to previous context
+4. Be specific about job details (duration, requirements, etc.) when available
+5. Keep responses conversational but informative (2-3 sentences max)
+6. If you need to perform actions (navigate, click apply), mention them clearly
+
+The next message describes the current page and conversation."""
+    
+    def fold_into_summary(self, summary, exchange):
+        """Add a turn that is leaving the recent window to the rolling summary"""
+        answer = re.split(r'(?<=[.!?])\s', exchange['assistant'].strip(), maxsplit=1)[0]
+        line = f"- On {exchange.get('page_context', 'general')} page, user asked \"{exchange['user'][:100]}\"; you said: {answer[:160]}"
+        lines = [l for l in summary.split('\n') if l] + [line]
+        # Oldest points fall out first once the summary outgrows its budget
+        while len(lines) > 1 and estimate_tokens('\n'.join(lines)) > self.summary_budget:
+            lines.pop(0)
+        return '\n'.join(lines)
+    
+    def build(self, user_input, content, history, summary, other_pages=""):
+        """Return (messages, prompt_tokens) for one turn"""
+        page_lines = [
+            f"PAGE: {content.url or 'unknown'} | type={content.page_type} | title={content.title}",
+            f"HEADINGS: {'; '.join(content.headings[:3])}"
+        ]
+        if content.page_type == 'career':
+            jobs = []
+            for job in content.job_listings:
+                if job.title:
+                    details = ', '.join(d for d in (job.duration, job.location) if d)
+                    jobs.append(f"{job.title} ({details})" if details else job.title)
+            # Long job boards are listed up to jobs_budget; retrieval brings in the ones asked about
+            listed, used = [], 0
+            for title in jobs:
+                used += estimate_tokens(title) + 1
+                if used > self.jobs_budget:
+                    break
+                listed.append(title)
+            more = f" (+{len(jobs) - len(listed)} more)" if len(listed) < len(jobs) else ""
+            page_lines.append(f"JOBS: {json.dumps(listed, separators=(',', ':'))}{more}")
+            page_lines.append(f"APPLY_BUTTONS: {'yes' if content.buttons else 'no'}")
+        
+        conversation_lines = []
+        if summary:
+            conversation_lines += ["EARLIER CONVERSATION (summary):", summary]
+        recent = []
+        used = 0
+        for exchange in reversed(history[-self.recent_turns:]):
+            turn = f"U: {exchange['user']}\nA: {exchange['assistant'][:300]}"
+            used += estimate_tokens(turn)
+            if recent and used > self.history_budget:
+                break
+            recent.insert(0, turn)
+        if recent:
+            conversation_lines += ["RECENT CONVERSATION:"] + recent
+        
+        sections = ['\n'.join(page_lines)]
+        if other_pages:
+            sections.append(other_pages)
+        if conversation_lines:
+            sections.append('\n'.join(conversation_lines))
+        
+        fixed_tokens = estimate_tokens(self.instructions) + estimate_tokens(user_input) + \
+            sum(estimate_tokens(s) for s in sections)
+        page_budget = max(self.token_budget - fixed_tokens, 100)
+        passages = self.retriever.select(content, user_input, page_budget)
+        sections.insert(1, "RELEVANT PAGE CONTENT:\n" + '\n---\n'.join(passages))
+        
+        messages = [
+            {"role": "system", "content": self.instructions},
+            {"role": "system", "content": '\n\n'.join(sections)},
+            {"role": "user", "content": user_input}
+        ]
+        prompt_tokens = sum(estimate_tokens(m['content']) for m in messages)
+        self.turn_tokens.append(prompt_tokens)
+        return messages, prompt_tokens
+    
+    def report(self):
+        if not self.turn_tokens:
+            return {'turns': 0}
+        return {'turns': len(self.turn_tokens), 'mean_prompt_tokens': sum(self.turn_tokens) // len(self.turn_tokens),
+                'max_prompt_tokens': max(self.turn_tokens), 'budget': self.token_budget}
+
+def page_content_hash(content):
+    """Stable hash of a page snapshot's extracted data, stable across runs (locators are ignored)"""
+    fingerprint = {
+        'url': content.url,
+        'title': content.title,
+        'headings': content.headings,
+        'jobs': [(job.title, job.description) for job in content.job_listings],
+        'forms': [[(inp.type, inp.name) for inp in form.inputs] for form in content.forms],
+        'main_content': content.main_content
+    }
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """Persistent LRU cache of LLM answers keyed by page content hash and normalized query
+    
+    Entries expire after ttl seconds, and every entry for a URL is dropped as soon
+    as that URL is seen with a different page hash. The key carries no
+    conversation state, so only questions that stand on their own are cached.
+    Writes to disk are batched: at most one every save_interval seconds, plus
+    flush() at shutdown.
+    """
+    
+    FILLER_WORDS = frozenset("please um uh hey so just can could would you tell me".split())
+    # Words that point back into the conversation ("tell me more", "the second one", "yes")
+    CONTEXT_REFERENCE = re.compile(
+        r"\b(?:it|its|that|this|these|those|they|them|their|he|she|him|her|one|ones|more|else|again|also|"
+        r"too|same|other|another|previous|earlier|last|first|second|third|above|before|yes|yeah|yep|no|nope|"
+        r"ok|okay|sure|what about|how about)\b")
+    
+    def __init__(self, path, max_entries=256, ttl=6 * 3600, save_interval=30.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.page_hashes = {}  # url -> page hash the cached entries were built from
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.last_save = time.monotonic()
+        self.load()
+    
+    def normalize_query(self, query):
+        words = re.sub(r"[^a-z0-9\s]", " ", query.lower()).split()
+        return ' '.join(w for w in words if w not in self.FILLER_WORDS)
+    
+    def cacheable(self, query):
+        """Whether the answer to query can be reused regardless of the conversation before it"""
+        return bool(self.normalize_query(query)) and not self.CONTEXT_REFERENCE.search(query.lower())
+    
+    def key(self, page_hash, query):
+        return hashlib.sha256(f"{page_hash}\n{self.normalize_query(query)}".encode('utf-8')).hexdigest()
+    
+    def sync_page(self, url, page_hash):
+        """Invalidate a URL's entries if its snapshot changed since they were cached"""
+        if self.page_hashes.get(url) == page_hash:
+            return
+        stale = [k for k, entry in self.entries.items() if entry['url'] == url]
+        for k in stale:
+            del self.entries[k]
+        self.page_hashes[url] = page_hash
+        self.dirty = True
+    
+    def get(self, url, page_hash, query):
+        with self.lock:
+            self.sync_page(url, page_hash)
+            key = self.key(page_hash, query)
+            entry = self.entries.get(key)
+            if entry and time.time() - entry['created'] > self.ttl:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry['response']
+    
+    def put(self, url, page_hash, query, response):
+        with self.lock:
+            self.sync_page(url, page_hash)
+            self.entries[self.key(page_hash, query)] = {'url': url, 'created': time.time(), 'response': response}
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.dirty = True
+            if time.monotonic() - self.last_save >= self.save_interval:
+                self.save()
+    
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries),
+                'hit_rate': self.hits / total if total else 0.0}
+    
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, entry in data.get('entries', []):
+            if now - entry['created'] <= self.ttl:
+                self.entries[key] = entry
+        self.page_hashes = data.get('page_hashes', {})
+    
+    def flush(self):
+        """Write pending changes to disk"""
+        with self.lock:
+            if self.dirty:
+                self.save()
+    
+    def save(self):
+        self.dirty = False
+        self.last_save = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': list(self.entries.items()), 'page_hashes': self.page_hashes}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist response cache: {e}")
+
+Intent = namedtuple('Intent', ['action', 'value', 'confidence'])
+
+class IntentRouter:
+    """Compiled intent matcher for navigation and job-application commands
+    
+    All phrase lists are folded into one regex with named groups, built once per
+    navigation map, so an utterance is classified in a single scan. Intents at or
+    above FAST_PATH_CONFIDENCE are safe to act on before the LLM has answered.
+    Other "go to <words>" phrases only become intents when the navigation map
+    finds a page for them.
+    """
+    
+    FAST_PATH_CONFIDENCE = 0.85
+    APPLY_PHRASES = ['apply for', 'want to apply', 'application']
+    NAV_VERBS = ['navigate to', 'go to', 'take me to', 'open', 'visit', 'show me']
+    RESPONSE_VERBS = ['navigate to', 'go to', 'visit']
+    # Topic words that imply a page without naming it (lower confidence - often just questions)
+    TOPIC_PAGES = {
+        'career': ['career', 'careers', 'job', 'jobs', 'position', 'positions', 'hiring', 'opening', 'openings'],
+        'contact': ['contact', 'reach out', 'get in touch'],
+        'services': ['service', 'services', 'what we do', 'offerings'],
+        'portfolio': ['portfolio', 'work', 'projects']
+    }
+    
+    def __init__(self, pages, job_keywords, navigation=None):
+        self.pages = list(pages)
+        self.job_keywords = list(job_keywords)
+        self.navigation = navigation
+        # An empty list must match nothing, not the empty string
+        alternation = lambda words: '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)) or '(?!)'
+        page_alt = alternation(self.pages)
+        
+        self.topic_pages = {word: page for page, words in self.TOPIC_PAGES.items() for word in words}
+        # One leading \b and one group per intent type: re tries every alternative at each
+        # position it reaches, so a group per keyword made short utterances slower than
+        # plain substring scans. The lookahead rejects most positions on their first letter.
+        first_letters = {w[0] for w in self.APPLY_PHRASES + self.NAV_VERBS + self.pages + self.job_keywords
+                         + list(self.topic_pages) if w}
+        self.user_pattern = re.compile(
+            rf"(?=[{re.escape(''.join(sorted(first_letters)))}])"
+            rf"\b(?:(?P<apply>{alternation(self.APPLY_PHRASES)})\b"
+            rf"|(?:{alternation(self.NAV_VERBS)})\s+(?:the\s+)?(?P<nav_target>{page_alt})\b"
+            rf"|(?P<page_target>{page_alt})\s+page\b"
+            rf"|(?P<job>{alternation(self.job_keywords)})\b"
+            rf"|(?P<topic>{alternation(self.topic_pages)})\b)")
+        # The LLM announces navigation in its reply ("I'll navigate to the career page")
+        self.response_pattern = re.compile(
+            rf"\b(?:{alternation(self.RESPONSE_VERBS)})\s+(?:the\s+)?(?P<nav_target>{page_alt})\b")
+        # Any other "go to <words>" is resolved fuzzily by the navigation map
+        self.loose_nav_pattern = re.compile(
+            rf"\b(?:{alternation(self.NAV_VERBS)})\s+(?:the\s+)?(?P<phrase>[a-z0-9]+(?:\s+[a-z0-9]+){{0,3}})")
+    
+    def classify(self, user_input):
+        """Intents found in the user's utterance, in execution priority order"""
+        apply_requested = False
+        job_keyword = None
+        navigations = []
+        topics = []
+        for match in self.user_pattern.finditer(user_input.lower()):
+            group = match.lastgroup
+            if group == 'apply':
+                apply_requested = True
+            elif group == 'job':
+                job_keyword = job_keyword or match.group('job')
+            elif group == 'nav_target':
+                navigations.append(Intent('navigate', match.group('nav_target'), 0.95))
+            elif group == 'page_target':
+                navigations.append(Intent('navigate', match.group('page_target'), 0.9))
+            else:
+                topics.append(self.topic_pages[match.group('topic')])
+        if not navigations and not topics and not apply_requested and self.navigation:
+            loose = self.loose_nav_pattern.search(user_input.lower())
+            name = loose and self.navigation.closest(NavigationIndex.normalize(loose.group('phrase')))
+            if name:
+                navigations.append(Intent('navigate', name, 0.7))
+        
+        intents = []
+        if apply_requested:
+            if job_keyword:
+                intents.append(Intent('apply_for_job', job_keyword, 0.9))
+            else:
+                intents.append(Intent('show_jobs', '', 0.9))
+        intents += navigations
+        for page in topics:
+            # A bare job word only implies the career page when nothing else was navigated
+            # to, and applying already takes the user there
+            if page == 'career' and (navigations or apply_requested):
+                continue
+            intents.append(Intent('navigate', page, 0.6))
+        return self.dedupe(intents)
+    
+    def classify_response(self, ai_response):
+        """Navigation the LLM said it would perform"""
+        text = ai_response.lower()
+        if not any(verb in text for verb in self.RESPONSE_VERBS):
+            return []  # Most replies announce nothing; substring checks are cheaper than the regex
+        return [Intent('navigate', m.group('nav_target'), 0.8) for m in self.response_pattern.finditer(text)]
+    
+    def fast_path(self, user_input):
+        """Actions confident enough to start before the LLM responds"""
+        return [(i.action, i.value) for i in self.classify(user_input)
+                if i.confidence >= self.FAST_PATH_CONFIDENCE and i.action in ('navigate', 'apply_for_job')]
+    
+    @staticmethod
+    def dedupe(intents):
+        seen = set()
+        unique = []
+        for intent in intents:
+            if (intent.action, intent.value) not in seen:
+                seen.add((intent.action, intent.value))
+                unique.append(intent)
+        return unique
+
+class SiteMap:
+    """The navigation map and the intent router compiled from it
+    
+    One instance is shared by the agent and its server sessions, so a refresh
+    after a crawl reaches every session at once.
+    """
+    
+    def __init__(self, navigation, job_keywords):
+        self.job_keywords = job_keywords
+        self.update(navigation)
+    
+    def update(self, navigation):
+        self.intent_router = IntentRouter(navigation.spoken_names(), self.job_keywords, navigation)
+        self.navigation = navigation
+
+RouteDecision = namedtuple('RouteDecision', ['model', 'max_tokens', 'reason', 'escalate'])
+
+class LowConfidence(Exception):
+    """The small model's answer hedged; the turn should go to the large model"""
+
+class FirstSentenceGate:
+    """Sentence callback that checks a streamed answer's first sentence before passing it on"""
+    
+    def __init__(self, on_sentence, hedges):
+        self.on_sentence = on_sentence
+        self.hedges = hedges
+        self.checked = False
+        self.seen = []
+    
+    def __call__(self, sentence):
+        self.seen.append(sentence)
+        if not self.checked:
+            if self.hedges(sentence):
+                raise LowConfidence()
+            self.checked = True
+        self.on_sentence(sentence)
+    
+    def finish(self):
+        if not self.checked:
+            raise LowConfidence()  # Nothing usable came back
+
+class ModelRouter:
+    """Picks the model for a turn from cheap features of the utterance
+    
+    Small talk and clear navigation/apply commands go to the small model with a
+    tight token cap. Long, multi-part or comparative questions and follow-ups that
+    lean on earlier turns ("the second one", "they", said first) go to the large
+    model; without an earlier turn nothing is a follow-up. Everything
+    else is a plain question about the site: the small model answers first, and
+    escalate marks the turn for the large model if that answer hedges.
+    """
+    
+    SMALL_TALK = re.compile(
+        r"^(?:hi|hello|hey|thanks|thank you|ok(?:ay)?|great|cool|nice|good (?:morning|afternoon|evening))\b")
+    COMPLEX = re.compile(
+        r"\b(?:compare|comparison|difference|differ|why|explain|recommend|pros|cons|versus|vs|"
+        r"which (?:one|is better)|in detail|step by step)\b")
+    # Bare pronouns only count leading the utterance: "is it remote" and "IT consulting" stand alone
+    FOLLOW_UP = re.compile(r"^(?:and |so |but )?(?:it|they|them|those|that)\b|"
+                           r"\b(?:that one|the (?:first|second|third|last|other) one|earlier|previous)\b")
+    HEDGES = re.compile(
+        r"\b(?:i'?m not sure|i am not sure|i don'?t (?:know|have)|i do not have|i can'?t (?:find|help|answer|say)|"
+        r"i cannot|no (?:information|details)|unable to|not (?:mentioned|specified|provided))\b", re.I)
+    
+    def __init__(self, fast_model=FAST_MODEL, large_model=LARGE_MODEL, max_fast_words=14):
+        self.fast_model = fast_model
+        self.large_model = large_model
+        self.max_fast_words = max_fast_words
+        self.large = RouteDecision(large_model, 400, 'escalated', False)
+    
+    def route(self, user_input, intents, has_history=False):
+        text = user_input.lower().strip()
+        words = len(text.split())
+        if self.SMALL_TALK.match(text) and words <= 6:
+            return RouteDecision(self.fast_model, 60, 'small_talk', False)
+        follow_up = has_history and self.FOLLOW_UP.search(text)
+        if self.COMPLEX.search(text) or follow_up or words > self.max_fast_words:
+            return RouteDecision(self.large_model, 400, 'complex', False)
+        commands = [i for i in intents if i.action in ('navigate', 'apply_for_job', 'show_jobs')
+                    and i.confidence >= IntentRouter.FAST_PATH_CONFIDENCE]
+        if commands and words <= 10:
+            return RouteDecision(self.fast_model, 120, 'command', False)
+        return RouteDecision(self.fast_model, 200, 'question', self.fast_model != self.large_model)
+    
+    def hedges(self, text):
+        return not text.strip() or bool(self.HEDGES.search(text))
+
+def uses_driver(method):
+    """Serialize an agent method's WebDriver access with other concurrent turn stages
+    
+    Also waits for the browser to come up, so commands given while Chrome is still
+    starting run as soon as the start page is loaded, and drops browser work queued
+    behind the lock once its turn has been cancelled.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.browser_ready.wait(BROWSER_STARTUP_TIMEOUT)
+        with self.driver_lock:
+            self.scheduler.check()
+            return method(self, *args, **kwargs)
+    return wrapper
+
+class SamplingProfiler:
+    """Low-overhead wall-clock sampler that aggregates collapsed stacks of all threads
+    
+    The output file uses the collapsed-stack format understood by flamegraph.pl
+    and speedscope.
+    """
+    
+    def __init__(self, output_path, interval=0.01):
+        self.output_path = output_path
+        self.interval = interval
+        self.samples = Counter()
+        self.running = False
+    
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.sample_loop, daemon=True, name='sampling-profiler').start()
+    
+    def sample_loop(self):
+        own_id = threading.get_ident()
+        while self.running:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = [f"{f.name} ({os.path.basename(f.filename)}:{f.lineno})"
+                         for f in traceback.extract_stack(frame)]
+                self.samples[';'.join(stack)] += 1
+            time.sleep(self.interval)
+    
+    def stop(self):
+        self.running = False
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"🔬 Profile written to {self.output_path} ({sum(self.samples.values())} samples)")
+
+class Tracer:
+    """Per-stage latency spans feeding histograms, JSONL traces and a Prometheus endpoint
+    
+    Disabled by default; when off, record() returns immediately and span() hands
+    back a no-op context, so instrumented code pays almost nothing.
+    Enable with AGENT_TRACE=1 (traces go to AGENT_TRACE_FILE), expose metrics with
+    AGENT_METRICS_PORT and turn on the sampling profiler with AGENT_PROFILE=1.
+    """
+    
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    
+    def __init__(self, enabled=False, trace_path=None, metrics_port=None, profile=False):
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self.metrics_port = metrics_port
+        self.lock = threading.Lock()
+        self.histograms = {}  # name -> [bucket counts..., +Inf count, sum]
+        self.turn_spans = []
+        self.webdriver_calls = 0
+        self.local = threading.local()
+        self.profiler = None
+        if enabled and profile:
+            self.profiler = SamplingProfiler(os.path.join(CACHE_DIR, f"profile-{int(time.time())}.collapsed"))
+    
+    @classmethod
+    def from_env(cls):
+        port = os.getenv('AGENT_METRICS_PORT')
+        return cls(enabled=os.getenv('AGENT_TRACE', '') not in ('', '0', 'false'),
+                   trace_path=os.getenv('AGENT_TRACE_FILE', os.path.join(CACHE_DIR, 'traces.jsonl')),
+                   metrics_port=int(port) if port else None,
+                   profile=os.getenv('AGENT_PROFILE', '') not in ('', '0', 'false'))
+    
+    def start(self):
+        """Start the metrics endpoint and profiler (if configured)"""
+        if not self.enabled:
+            return
+        if self.metrics_port:
+            self.serve_metrics(self.metrics_port)
+        if self.profiler:
+            self.profiler.start()
+    
+    def stop(self):
+        if self.profiler:
+            self.profiler.stop()
+    
+    def record(self, name, duration, **attrs):
+        """Record a finished span"""
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.setdefault(name, [0] * (len(self.BUCKETS) + 1) + [0.0])
+            for i, bound in enumerate(self.BUCKETS):
+                if duration <= bound:
+                    histogram[i] += 1
+            histogram[len(self.BUCKETS)] += 1
+            histogram[-1] += duration
+            self.turn_spans.append(dict(name=name, duration=round(duration, 4), thread=threading.current_thread().name, **attrs))
+    
+    def span(self, name, **attrs):
+        """Context manager timing a block; yields a dict the block may add attributes to"""
+        if not self.enabled:
+            return nullcontext({})  # A fresh dict, so attributes set while disabled die with the block
+        return self._span(name, attrs)
+    
+    @contextmanager
+    def _span(self, name, attrs):
+        started = time.monotonic()
+        calls_before = self.driver_calls()
+        try:
+            yield attrs
+        finally:
+            driver_calls = self.driver_calls() - calls_before
+            if driver_calls:
+                attrs['webdriver_calls'] = driver_calls
+            self.record(name, time.monotonic() - started, **attrs)
+    
+    def driver_calls(self):
+        """WebDriver commands issued so far by the current thread"""
+        return getattr(self.local, 'driver_calls', 0)
+    
+    def instrument_driver(self, driver):
+        """Count every WebDriver HTTP command so spans can report round trips"""
+        if not self.enabled:
+            return
+        execute = driver.execute
+        
+        def counted_execute(*args, **kwargs):
+            self.local.driver_calls = self.driver_calls() + 1
+            with self.lock:
+                self.webdriver_calls += 1
+            return execute(*args, **kwargs)
+        driver.execute = counted_execute
+    
+    def session_view(self):
+        """Tracer for one server session: records into the shared histograms, collects its own turn spans
+        
+        Without it, concurrent sessions' spans land in one list and each turn's trace
+        holds other visitors' stages. Drivers are still instrumented by the shared tracer.
+        """
+        view = copy.copy(self)
+        view.turn_spans = []
+        return view
+    
+    def flush_turn(self, **turn_attrs):
+        """Append the spans collected for the finished turn to the JSONL trace file"""
+        if not self.enabled:
+            return
+        with self.lock:
+            spans, self.turn_spans = self.turn_spans, []
+        if not self.trace_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.trace_path), exist_ok=True)
+            with open(self.trace_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(dict(timestamp=time.time(), spans=spans, **turn_attrs)) + '\n')
+        except OSError as e:
+            logger.warning(f"Could not write trace: {e}")
+    
+    def prometheus_text(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = ['# HELP agent_stage_seconds Latency of each voice-turn stage.',
+                 '# TYPE agent_stage_seconds histogram']
+        with self.lock:
+            for name, histogram in sorted(self.histograms.items()):
+                for bound, count in zip(self.BUCKETS, histogram):
+                    lines.append(f'agent_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+                lines.append(f'agent_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram[len(self.BUCKETS)]}')
+                lines.append(f'agent_stage_seconds_sum{{stage="{name}"}} {histogram[-1]:.6f}')
+                lines.append(f'agent_stage_seconds_count{{stage="{name}"}} {histogram[len(self.BUCKETS)]}')
+            lines += ['# HELP agent_webdriver_calls_total WebDriver commands issued.',
+                      '# TYPE agent_webdriver_calls_total counter',
+                      f'agent_webdriver_calls_total {self.webdriver_calls}']
+        return '\n'.join(lines) + '\n'
+    
+    def serve_metrics(self, port):
+        tracer = self
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True, name='metrics-server').start()
+        print(f"📈 Metrics available at http://127.0.0.1:{port}/metrics")
+
+class TurnTimeline:
+    """Records when each stage of a voice turn started and finished"""
+    
+    def __init__(self, tracer=None):
+        self.started_at = time.monotonic()
+        self.tracer = tracer
+        self.lock = threading.Lock()
+        self.stages = []  # (name, start, end) in seconds since the turn started
+    
+    @contextmanager
+    def stage(self, name):
+        start = time.monotonic() - self.started_at
+        try:
+            yield
+        finally:
+            end = time.monotonic() - self.started_at
+            with self.lock:
+                self.stages.append((name, start, end))
+            if self.tracer:
+                self.tracer.record(name, end - start, start=round(start, 4))
+    
+    def run(self, name, fn, *args, **kwargs):
+        """Call fn inside a named stage (handy as an executor target)"""
+        with self.stage(name):
+            return fn(*args, **kwargs)
+    
+    def mark(self, name):
+        """Record an instantaneous event"""
+        now = time.monotonic() - self.started_at
+        with self.lock:
+            self.stages.append((name, now, now))
+    
+    def total(self):
+        return time.monotonic() - self.started_at
+    
+    def summary(self):
+        with self.lock:
+            ordered = sorted(self.stages, key=lambda s: s[1])
+        parts = [f"{name} {start:.2f}-{end:.2f}s" if end > start else f"{name} @{start:.2f}s"
+                 for name, start, end in ordered]
+        return f"{' | '.join(parts)} (total {self.total():.2f}s)"
+
+class TurnCancelled(Exception):
+    """Raised at a checkpoint of a turn that a newer press has cancelled"""
+
+class TurnScheduler:
+    """Runs voice turns one at a time on a single worker thread
+    
+    submit() supersedes the turn in flight (and any still queued) and interrupt()
+    cancels it outright for barge-in. Cancellation is cooperative: turn stages call
+    check() between steps, and on_cancel() callbacks unblock waits that cannot poll,
+    such as an open LLM stream. The time from cancel until the old turn has actually
+    stopped is recorded as 'barge_in' and warned about above max_interrupt_latency.
+    """
+    
+    def __init__(self, tracer=None, max_interrupt_latency=0.5):
+        self.tracer = tracer or Tracer()
+        self.max_interrupt_latency = max_interrupt_latency
+        self.lock = threading.Lock()
+        self.jobs = queue.Queue()
+        self.worker = None
+        self.generation = 0  # Bumped on every submit/interrupt; older turns are cancelled
+        self.running = None  # Generation of the turn on the worker right now
+        self.pending = 0
+        self.idle = threading.Event()
+        self.idle.set()
+        self.callbacks = []
+        self.cancelled_at = None
+        self.interrupt_latencies = []
+    
+    def submit(self, fn, *args):
+        """Queue fn(*args) as the next turn, cancelling whatever came before it"""
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.worker_loop, daemon=True, name='turn')
+                self.worker.start()
+            callbacks = self.cancel_locked()
+            self.pending += 1
+            self.idle.clear()
+            self.jobs.put((self.generation, fn, args))
+        self.run_callbacks(callbacks)
+    
+    def interrupt(self):
+        """Cancel the turn in flight and any queued one"""
+        with self.lock:
+            callbacks = self.cancel_locked()
+        self.run_callbacks(callbacks)
+    
+    def cancel_locked(self):
+        self.generation += 1
+        if self.running is None or self.cancelled_at is not None:
+            return []
+        self.cancelled_at = time.monotonic()
+        callbacks, self.callbacks = self.callbacks, []
+        return callbacks
+    
+    def run_callbacks(self, callbacks):
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"Cancel callback failed: {e}")
+    
+    def cancelled(self):
+        """True while the turn on the worker has been superseded"""
+        running = self.running
+        return running is not None and running != self.generation
+    
+    def check(self):
+        """Checkpoint: raise TurnCancelled if the current turn was cancelled"""
+        if self.cancelled():
+            raise TurnCancelled()
+    
+    @contextmanager
+    def on_cancel(self, callback):
+        """Call callback from the cancelling thread if the turn is cancelled inside this block"""
+        with self.lock:
+            self.callbacks.append(callback)
+        try:
+            if self.cancelled():
+                callback()
+            yield
+        finally:
+            with self.lock:
+                if callback in self.callbacks:
+                    self.callbacks.remove(callback)
+        self.check()  # A block that returned because of the cancel did not really finish
+    
+    def run_abandonable(self, executor, fn, *args, dispose=None):
+        """Run a blocking call with no checkpoints on executor, giving up on it once cancelled
+        
+        For waits like an LLM request that has not sent its first byte yet. The call
+        itself runs to completion; dispose(result) releases whatever it returns late.
+        """
+        if self.running is None:
+            return fn(*args)
+        return self.wait_abandonable(executor.submit(fn, *args), dispose)
+    
+    def wait_abandonable(self, future, dispose=None):
+        """Wait for a call already running elsewhere, giving up on it once cancelled"""
+        settled = threading.Event()
+        future.add_done_callback(lambda f: settled.set())
+        with self.on_cancel(settled.set):
+            settled.wait()
+            if self.cancelled() and dispose:
+                future.add_done_callback(lambda f: f.exception() is None and dispose(f.result()))
+        return future.result()
+    
+    def wait_until_idle(self, timeout=None):
+        return self.idle.wait(timeout)
+    
+    def worker_loop(self):
+        while True:
+            generation, fn, args = self.jobs.get()
+            with self.lock:
+                superseded = generation != self.generation
+                if not superseded:
+                    self.running = generation
+            if not superseded:
+                try:
+                    fn(*args)
+                except TurnCancelled:
+                    print("⏹️ Turn cancelled")
+                except Exception as e:
+                    print(f"❌ Turn failed: {e}")
+            with self.lock:
+                self.running = None
+                self.callbacks = []
+                cancelled_at, self.cancelled_at = self.cancelled_at, None
+                self.pending -= 1
+                if self.pending == 0:
+                    self.idle.set()
+            if cancelled_at is not None:
+                latency = time.monotonic() - cancelled_at
+                self.interrupt_latencies.append(latency)
+                self.tracer.record('barge_in', latency)
+                if latency > self.max_interrupt_latency:
+                    print(f"⚠️ Cancelled turn took {latency:.2f}s to stop")
+
+class SentenceSplitter:
+    """Incrementally split streamed LLM text into complete sentences"""
+    
+    # Sentence end: terminal punctuation (plus closing quotes/brackets) followed by
+    # whitespace and something that looks like the start of a new sentence
+    BOUNDARY = re.compile(r'([.!?]+["\')\]]*)\s+(?=["\'(\[]?[A-Z0-9])|\n+')
+    MIN_SENTENCE_CHARS = 12
+    
+    def __init__(self):
+        self.buffer = ""
+    
+    def feed(self, text):
+        """Add streamed text and return any sentences that are now complete"""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in self.BOUNDARY.finditer(self.buffer):
+            end = match.end(1) if match.group(1) else match.start()
+            sentence = self.buffer[start:end].strip()
+            # Hold back very short fragments ("Mr.", "1.") and join them with what follows
+            if len(sentence) < self.MIN_SENTENCE_CHARS:
+                continue
+            sentences.append(sentence)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+    
+    def flush(self):
+        """Return whatever text is left once the stream has ended"""
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        return remainder
+
+class LatencyBudget:
+    """Per-turn deadline for an LLM call, split into connect, first-byte and total budgets"""
+    
+    def __init__(self, total=12.0, connect=2.0, first_byte=6.0):
+        self.total = total
+        self.connect = connect
+        self.first_byte = first_byte
+        self.started_at = time.monotonic()
+    
+    def remaining(self):
+        return self.total - (time.monotonic() - self.started_at)
+    
+    def expired(self):
+        return self.remaining() <= 0
+    
+    def timeouts(self):
+        """(connect, read) timeouts for the next attempt, clipped to what is left of the turn"""
+        remaining = max(self.remaining(), 0.1)
+        return (min(self.connect, remaining), min(self.first_byte, remaining))
+
+class GroqClient:
+    """Pooled, pre-warmed HTTP client for the OpenAI-compatible Groq API
+    
+    A persistent session keeps TCP+TLS connections open between utterances, so
+    only the first request (or the keep-alive ping) pays the handshake cost.
+    """
+    
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+    
+    def __init__(self, api_key, chat_url, pool_size=4, keepalive_interval=20.0):
+        self.chat_url = chat_url
+        self.models_url = chat_url.rsplit('/chat/completions', 1)[0] + '/models'
+        self.keepalive_interval = keepalive_interval
+        self.last_used = 0.0
+        self._keepalive_thread = None
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+    
+    def warm(self):
+        """Open (or refresh) a pooled connection with a cheap request"""
+        try:
+            self.session.get(self.models_url, timeout=(2, 5)).close()
+            self.last_used = time.monotonic()
+            return True
+        except requests.RequestException as e:
+            logger.debug(f"LLM connection warm-up failed: {e}")
+            return False
+    
+    def start_keepalive(self):
+        """Keep a pooled connection warm while the user is idle"""
+        if self._keepalive_thread:
+            return
+        
+        def keepalive_loop():
+            while True:
+                time.sleep(self.keepalive_interval / 2)
+                if time.monotonic() - self.last_used >= self.keepalive_interval:
+                    self.warm()
+        
+        self._keepalive_thread = threading.Thread(target=keepalive_loop, daemon=True)
+        self._keepalive_thread.start()
+    
+    def chat(self, payload, budget=None, stream=False):
+        """POST a chat completion, retrying transient failures within the turn budget"""
+        budget = budget or LatencyBudget()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self.session.post(self.chat_url, json=payload, stream=stream,
+                                             timeout=budget.timeouts())
+                self.last_used = time.monotonic()
+                if response.status_code not in self.RETRY_STATUS:
+                    return response
+                error = requests.HTTPError(f"{response.status_code} from LLM endpoint", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response = None
+                error = e
+            
+            # Only retry while there is still time for a connect plus a useful response
+            backoff = min(0.25 * attempt, 1.0)
+            if budget.remaining() - backoff < budget.connect + 1.0:
+                if response is not None:
+                    return response
+                raise error
+            print(f"⚠️ LLM request failed ({error}), retrying...")
+            if response is not None:
+                response.close()
+            time.sleep(backoff)
+
+class SpeechBackend:
+    """Speech-to-text backend that can decode audio while it is still being captured"""
+    
+    name = 'base'
+    
+    def start(self, sample_rate, sample_width):
+        """Called when a new utterance starts"""
+    
+    def feed(self, chunk):
+        """Called with each raw PCM chunk as it is captured"""
+    
+    def finish(self, audio_data):
+        """Return the final transcript for the utterance (raises sr.UnknownValueError if empty)"""
+        raise NotImplementedError
+
+class GoogleSpeechBackend(SpeechBackend):
+    """Google Web Speech API; transcribes the whole utterance after release"""
+    
+    name = 'google'
+    
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+    
+    def finish(self, audio_data):
+        return self.recognizer.recognize_google(audio_data)
+
+class VoskSpeechBackend(SpeechBackend):
+    """Offline, CPU-only recognition with Vosk, decoded incrementally during capture
+    
+    By the time the talk button comes up almost all audio has been decoded, so
+    finishing only flushes the last partial segment.
+    """
+    
+    name = 'vosk'
+    
+    def __init__(self, model_path):
+        from vosk import Model, SetLogLevel  # Optional dependency: pip install vosk
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+        self.recognizer = None
+        self.segments = []
+        self.partial = ""
+    
+    def start(self, sample_rate, sample_width):
+        from vosk import KaldiRecognizer
+        self.recognizer = KaldiRecognizer(self.model, sample_rate)
+        self.segments = []
+        self.partial = ""
+    
+    def feed(self, chunk):
+        if self.recognizer.AcceptWaveform(chunk):
+            text = json.loads(self.recognizer.Result()).get('text', '')
+            if text:
+                self.segments.append(text)
+            self.partial = ""
+        else:
+            self.partial = json.loads(self.recognizer.PartialResult()).get('partial', '')
+    
+    def finish(self, audio_data):
+        if self.recognizer is None:
+            # Audio did not come through feed() (e.g. a recorded file) - decode it in one go
+            self.start(audio_data.sample_rate, audio_data.sample_width)
+            self.feed(audio_data.get_raw_data())
+        final = json.loads(self.recognizer.FinalResult()).get('text', '')
+        self.recognizer = None
+        transcript = ' '.join(self.segments + [final]).strip()
+        if not transcript:
+            raise sr.UnknownValueError()
+        return transcript
+
+def create_speech_backend(name, recognizer):
+    """Build the configured STT backend, falling back to Google if it is unavailable"""
+    name = (name or 'google').lower()
+    if name == 'vosk':
+        model_path = os.getenv('VOSK_MODEL_PATH', 'models/vosk-model-small-en-us-0.15')
+        try:
+            backend = VoskSpeechBackend(model_path)
+            print(f"✅ Offline speech recognition ready (Vosk model: {model_path})")
+            return backend
+        except Exception as e:
+            print(f"⚠️ Vosk backend unavailable ({e}), falling back to Google speech recognition")
+    elif name != 'google':
+        print(f"⚠️ Unknown speech backend '{name}', using Google speech recognition")
+    return GoogleSpeechBackend(recognizer)
+
+class AudioCapture:
+    """One always-open microphone stream recorded into a fixed-size ring buffer
+    
+    Push-to-talk only marks where an utterance starts and ends: begin() reaches
+    pre_roll seconds back into the buffer, so nothing said while the button goes
+    down is clipped and no device is opened on the critical path. With hands-free
+    mode an energy VAD finds utterances by itself. The recognizer's energy
+    threshold is seeded from the first calibration_seconds of audio, then keeps
+    adapting to the room on audio outside utterances (the agent's own speech
+    included); a hands-free segment that runs to the length limit is taken as
+    noise and lifts the threshold above it.
+    """
+    
+    SAMPLE_DTYPES = {1: 'int8', 2: 'int16', 4: 'int32'}
+    
+    def __init__(self, microphone, recognizer, buffer_seconds=15.0, pre_roll=0.3,
+                 max_utterance_seconds=10.0, calibration_seconds=1.0, tracer=None):
+        self.microphone = microphone
+        self.recognizer = recognizer
+        self.calibration_seconds = calibration_seconds
+        self.calibration = []  # Room energy until the threshold is seeded; None afterwards
+        self.buffer_seconds = buffer_seconds
+        self.pre_roll = pre_roll
+        self.max_utterance_seconds = max_utterance_seconds
+        self.tracer = tracer or Tracer()
+        self.lock = threading.Lock()
+        self.source = None
+        self.ring = deque()
+        self.next_index = 0  # Absolute index of the next chunk written to the ring
+        self.chunk_seconds = 0.0
+        self.segment = None  # Utterance in progress: start index, STT backend, VAD state
+        self.running = False
+        self.on_utterance = None
+        self.hands_free_stt = None
+        self.is_suppressed = lambda: False
+        self.utterances = queue.Queue()
+    
+    def start(self):
+        """Open the input stream once and start filling the ring buffer"""
+        with self.lock:
+            if self.running:
+                return
+            self.source = self.microphone.__enter__()
+            self.chunk_seconds = self.source.CHUNK / self.source.SAMPLE_RATE
+            self.ring = deque(maxlen=int(self.buffer_seconds / self.chunk_seconds) + 1)
+            self.running = True
+        threading.Thread(target=self.capture_loop, daemon=True, name='audio-capture').start()
+    
+    def stop(self):
+        """Stop capturing and close the input stream"""
+        with self.lock:
+            if not self.running:
+                return
+            self.running = False
+            self.utterances.put(None)
+        time.sleep(self.chunk_seconds)  # Let the capture loop finish its last read
+        try:
+            self.microphone.__exit__(None, None, None)
+        except Exception as e:
+            print(f"⚠️ Error closing microphone: {e}")
+    
+    def enable_hands_free(self, stt, on_utterance, is_suppressed=None):
+        """Detect utterances with the energy VAD and pass each one to on_utterance(audio, ended_at)"""
+        self.hands_free_stt = stt
+        self.on_utterance = on_utterance
+        self.is_suppressed = is_suppressed or (lambda: False)
+        threading.Thread(target=self.utterance_worker, daemon=True, name='hands-free').start()
+    
+    def begin(self, stt):
+        """Start a push-to-talk utterance pre_roll seconds in the past"""
+        with self.lock:
+            self.segment = self.open_segment(self.next_index - round(self.pre_roll / self.chunk_seconds), stt)
+    
+    def end(self):
+        """Finish the push-to-talk utterance and return its AudioData (None if none was started)"""
+        with self.lock:
+            segment, self.segment = self.segment, None
+            return self.close_segment(segment) if segment else None
+    
+    def open_segment(self, start, stt, hands_free=False):
+        # Caller holds the lock; the STT backend catches up on the pre-roll straight away
+        start = max(start, self.next_index - len(self.ring))
+        stt.start(self.source.SAMPLE_RATE, self.source.SAMPLE_WIDTH)
+        for chunk in self.slice(start):
+            stt.feed(chunk)
+        return {'start': start, 'stt': stt, 'hands_free': hands_free, 'voiced': 0, 'silence': 0.0, 'energies': []}
+    
+    def close_segment(self, segment):
+        end = min(self.next_index, segment['start'] + self.max_chunks())
+        self.tracer.record('record', (end - segment['start']) * self.chunk_seconds,
+                           stt_backend=segment['stt'].name)
+        frames = b''.join(self.slice(segment['start'], end))
+        return sr.AudioData(frames, self.source.SAMPLE_RATE, self.source.SAMPLE_WIDTH)
+    
+    def slice(self, start, end=None):
+        """Chunks [start, end) by absolute index, clipped to what the ring still holds"""
+        first = self.next_index - len(self.ring)
+        stop = None if end is None else max(end - first, 0)
+        return list(itertools.islice(self.ring, max(start - first, 0), stop))
+    
+    def max_chunks(self):
+        return int(self.max_utterance_seconds / self.chunk_seconds)
+    
+    def energy(self, chunk):
+        samples = np.frombuffer(chunk, dtype=self.SAMPLE_DTYPES.get(self.source.SAMPLE_WIDTH, 'int16'))
+        return float(np.sqrt(np.mean(samples.astype(np.float64) ** 2))) if samples.size else 0.0
+    
+    def adapt_threshold(self, energy):
+        """Same damped update speech_recognition applies while it waits for a phrase"""
+        if not self.recognizer.dynamic_energy_threshold:
+            return
+        damping = self.recognizer.dynamic_energy_adjustment_damping ** self.chunk_seconds
+        target = energy * self.recognizer.dynamic_energy_ratio
+        self.recognizer.energy_threshold = self.recognizer.energy_threshold * damping + target * (1 - damping)
+    
+    def calibrate(self, energy):
+        """Collect room energy for the first calibration_seconds, then seed the threshold from it
+        
+        Like adjust_for_ambient_noise, but off the ring buffer instead of a blocking
+        pass; returns True while still calibrating.
+        """
+        self.calibration.append(energy)
+        if len(self.calibration) * self.chunk_seconds < self.calibration_seconds:
+            return True
+        if self.recognizer.dynamic_energy_threshold:
+            self.recognizer.energy_threshold = float(np.mean(self.calibration)) * self.recognizer.dynamic_energy_ratio
+            logger.info(f"Energy threshold seeded at {self.recognizer.energy_threshold:.0f}")
+        self.calibration = None
+        return False
+    
+    def capture_loop(self):
+        while self.running:
+            try:
+                chunk = self.source.stream.read(self.source.CHUNK)
+            except Exception as e:
+                if self.running:
+                    print(f"⚠️ Microphone read error: {e}")
+                    time.sleep(0.1)
+                continue
+            energy = self.energy(chunk)
+            with self.lock:
+                self.ring.append(chunk)
+                self.next_index += 1
+                self.track(chunk, energy)
+    
+    def track(self, chunk, energy):
+        # Caller holds the lock
+        segment = self.segment
+        if segment is None and self.calibration is not None and self.calibrate(energy):
+            return
+        speaking = energy > self.recognizer.energy_threshold
+        if segment is None:
+            if self.on_utterance and speaking and not self.is_suppressed():
+                pre_roll = round(self.pre_roll / self.chunk_seconds)
+                self.segment = self.open_segment(self.next_index - 1 - pre_roll, self.hands_free_stt,
+                                                 hands_free=True)
+                self.segment['voiced'] = 1
+                self.segment['energies'].append(energy)
+            else:
+                self.adapt_threshold(energy)
+            return
+        
+        if self.next_index - segment['start'] <= self.max_chunks():
+            segment['stt'].feed(chunk)
+        if not segment['hands_free']:
+            return
+        segment['energies'].append(energy)
+        if speaking:
+            segment['voiced'] += 1
+            segment['silence'] = 0.0
+        else:
+            segment['silence'] += self.chunk_seconds
+        too_long = self.next_index - segment['start'] >= self.max_chunks()
+        if too_long and self.recognizer.dynamic_energy_threshold:
+            # No pause in max_utterance_seconds: sound this steady is the room, not a speaker
+            room = float(np.median(segment['energies'])) * self.recognizer.dynamic_energy_ratio
+            self.recognizer.energy_threshold = max(self.recognizer.energy_threshold, room)
+        if segment['silence'] >= self.recognizer.pause_threshold or too_long:
+            self.segment = None
+            # Clicks and short bursts of noise are not utterances
+            if segment['voiced'] * self.chunk_seconds >= self.recognizer.phrase_threshold:
+                self.utterances.put((self.close_segment(segment), time.monotonic()))
+    
+    def utterance_worker(self):
+        """Hand hands-free utterances to the agent one at a time"""
+        while True:
+            item = self.utterances.get()
+            if item is None:
+                return
+            try:
+                self.on_utterance(*item)
+            except Exception as e:
+                print(f"⚠️ Hands-free turn failed: {e}")
+
+def chunk_text_for_speech(text, max_chars=200):
+    """Split text into speakable chunks on sentence (then clause, then word) boundaries"""
+    clean_text = re.sub(r'[^\w\s.,!?-]', '', text)
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', clean_text) if s.strip()]
+    
+    pieces = []
+    for sentence in sentences:
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(', ', 0, max_chars) + 1
+            if cut <= 0:
+                cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+    
+    # Pack short sentences together so each synthesis call is worth its startup cost
+    chunks = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] += ' ' + piece
+        else:
+            chunks.append(piece)
+    return chunks
+
+class TTSBackend:
+    """Text-to-speech backend: synthesis and playback are separate so they can overlap"""
+    
+    name = 'base'
+    
+    def __init__(self):
+        self.player_process = None
+    
+    def synthesize(self, text):
+        """Render text to audio and return a handle that play() understands"""
+        raise NotImplementedError
+    
+    def play(self, audio):
+        """Play rendered audio, blocking until it finishes"""
+        raise NotImplementedError
+    
+    def cleanup(self, audio):
+        if isinstance(audio, str) and os.path.exists(audio):
+            os.remove(audio)
+    
+    def run_player(self, command):
+        """Run a playback command that stop() can terminate"""
+        self.player_process = subprocess.Popen(command)
+        try:
+            returncode = self.player_process.wait()
+        finally:
+            self.player_process = None
+        if returncode > 0:
+            raise subprocess.CalledProcessError(returncode, command)
+    
+    def stop(self):
+        """Cut the chunk that is playing short (called from another thread)"""
+        process = self.player_process
+        if process and process.poll() is None:
+            process.terminate()
+
+class MacSayBackend(TTSBackend):
+    """macOS `say` rendered to a file, played with `afplay`"""
+    
+    name = 'say'
+    
+    def __init__(self, rate=200):
+        super().__init__()
+        self.rate = rate
+    
+    def synthesize(self, text):
+        fd, path = tempfile.mkstemp(suffix='.aiff')
+        os.close(fd)
+        subprocess.run(['say', '-r', str(self.rate), '-o', path, text], check=True)
+        return path
+    
+    def play(self, audio):
+        self.run_player(['afplay', audio])
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng (or espeak) rendered to WAV, played with aplay/paplay"""
+    
+    name = 'espeak'
+    
+    def __init__(self, rate=175):
+        super().__init__()
+        self.rate = rate
+        self.engine = shutil.which('espeak-ng') or shutil.which('espeak')
+        self.player = shutil.which('paplay') or shutil.which('aplay')
+        if not self.engine or not self.player:
+            raise RuntimeError("espeak-ng/espeak and aplay/paplay are required")
+    
+    def synthesize(self, text):
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        subprocess.run([self.engine, '-s', str(self.rate), '-w', path, text], check=True)
+        return path
+    
+    def play(self, audio):
+        command = [self.player, audio] if self.player.endswith('paplay') else [self.player, '-q', audio]
+        self.run_player(command)
+
+class Pyttsx3Backend(TTSBackend):
+    """pyttsx3 fallback (speaks directly, so synthesis cannot overlap playback)"""
+    
+    name = 'pyttsx3'
+    
+    def __init__(self, rate=190):
+        super().__init__()
+        import pyttsx3  # Optional dependency: pip install pyttsx3
+        self.engine = pyttsx3.init()
+        self.engine.setProperty('rate', rate)
+    
+    def synthesize(self, text):
+        return text
+    
+    def play(self, audio):
+        self.engine.say(audio)
+        self.engine.runAndWait()
+    
+    def stop(self):
+        self.engine.stop()
+    
+    def cleanup(self, audio):
+        pass
+
+class WavFileBackend(TTSBackend):
+    """Silent stand-in for tests and headless runs
+    
+    Writes a silent WAV per chunk (sized like real speech at ~165 wpm) to output_dir
+    when one is given; with realtime=True playback sleeps for the audio duration.
+    """
+    
+    name = 'null'
+    SAMPLE_RATE = 16000
+    
+    def __init__(self, output_dir=None, realtime=False, words_per_minute=165):
+        super().__init__()
+        self.output_dir = output_dir
+        self.realtime = realtime
+        self.words_per_minute = words_per_minute
+        self.chunks_written = 0
+        self.stopped = threading.Event()
+        if output_dir:
+            self.name = 'wav'
+            os.makedirs(output_dir, exist_ok=True)
+    
+    def synthesize(self, text):
+        duration = len(text.split()) * 60.0 / self.words_per_minute
+        if self.output_dir:
+            self.chunks_written += 1
+            path = os.path.join(self.output_dir, f"chunk_{self.chunks_written:04d}.wav")
+            with wave.open(path, 'wb') as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(self.SAMPLE_RATE)
+                f.writeframes(b'\x00\x00' * int(duration * self.SAMPLE_RATE))
+        return duration
+    
+    def play(self, audio):
+        if self.realtime:
+            self.stopped.clear()
+            self.stopped.wait(audio)
+    
+    def stop(self):
+        self.stopped.set()
+    
+    def cleanup(self, audio):
+        pass
+
+def create_tts_backend(name=None):
+    """Pick a TTS backend by name, or the best one available on this platform"""
+    name = (name or '').lower()
+    candidates = [name] if name else (['say'] if sys.platform == 'darwin' else ['espeak', 'pyttsx3'])
+    factories = {'say': MacSayBackend, 'espeak': EspeakBackend, 'pyttsx3': Pyttsx3Backend,
+                 'null': WavFileBackend}
+    for candidate in candidates:
+        if candidate not in factories:
+            print(f"⚠️ Unknown TTS backend '{candidate}'")
+            continue
+        try:
+            return factories[candidate]()
+        except Exception as e:
+            print(f"⚠️ TTS backend '{candidate}' unavailable: {e}")
+    print("⚠️ No speech output available - responses will only be printed")
+    return WavFileBackend()
+
+class SpeechOutput:
+    """Non-blocking speech pipeline: chunk N+1 is synthesized while chunk N plays
+    
+    say() only enqueues text. A synthesis worker renders chunks into a small
+    buffer and a playback worker plays them back to back. Time-to-first-audio
+    (enqueue to playback start) and gaps between consecutive chunks are recorded.
+    interrupt() drops everything queued and stops the playing chunk; chunks carry
+    the generation they were queued in, so the workers skip stale ones.
+    """
+    
+    def __init__(self, backend, max_chunk_chars=200, buffered_chunks=2, tracer=None):
+        self.backend = backend
+        self.tracer = tracer or Tracer()
+        self.max_chunk_chars = max_chunk_chars
+        self.text_queue = queue.Queue()
+        self.audio_queue = queue.Queue(maxsize=buffered_chunks)
+        self.lock = threading.Lock()
+        self.pending = 0  # Chunks enqueued but not yet played
+        self.idle = threading.Event()
+        self.idle.set()
+        self.burst_started = None
+        self.last_play_end = None
+        self.time_to_first_audio = []
+        self.chunk_gaps = []
+        self.generation = 0
+        self.interrupted_at = None
+        self.stale = 0
+        self.interrupt_latencies = []  # interrupt() until the speaker is silent
+        self.closed = False
+        threading.Thread(target=self.synthesis_worker, daemon=True).start()
+        threading.Thread(target=self.playback_worker, daemon=True).start()
+    
+    def say(self, text):
+        """Queue text for speaking and return immediately"""
+        chunks = chunk_text_for_speech(text, self.max_chunk_chars)
+        if not chunks:
+            return
+        with self.lock:
+            if self.pending == self.stale:
+                self.burst_started = time.monotonic()
+                self.last_play_end = None
+            self.pending += len(chunks)
+            self.idle.clear()
+            generation = self.generation
+        for chunk in chunks:
+            self.text_queue.put((generation, chunk))
+    
+    def interrupt(self):
+        """Barge-in: drop all queued speech and cut the playing chunk short"""
+        with self.lock:
+            if self.pending == 0:
+                return
+            self.generation += 1
+            self.interrupted_at = time.monotonic()
+            self.stale = self.pending  # Everything queued so far belongs to older generations
+            self.burst_started = None
+        self.backend.stop()
+    
+    def wait_until_idle(self, timeout=None):
+        """Block until everything queued so far has been spoken"""
+        return self.idle.wait(timeout)
+    
+    def close(self):
+        """Stop both workers once the queued speech has played"""
+        if not self.closed:
+            self.closed = True
+            self.text_queue.put(None)
+    
+    def synthesis_worker(self):
+        while True:
+            item = self.text_queue.get()
+            if item is None:
+                self.audio_queue.put(self)  # Tells the playback worker to exit
+                return
+            generation, chunk = item
+            if generation != self.generation:
+                self.audio_queue.put((generation, None))  # Interrupted; playback still counts it off
+                continue
+            try:
+                with self.tracer.span('tts_synthesize', backend=self.backend.name):
+                    audio = self.backend.synthesize(chunk)
+            except Exception as e:
+                print(f"Error synthesizing speech with {self.backend.name}: {e}")
+                audio = None
+            self.audio_queue.put((generation, audio))
+    
+    def playback_worker(self):
+        while True:
+            item = self.audio_queue.get()
+            if item is self:
+                return
+            generation, audio = item
+            if generation != self.generation:
+                if audio is not None:
+                    self.backend.cleanup(audio)
+                self.chunk_done(generation)
+                continue
+            started = time.monotonic()
+            with self.lock:
+                if self.burst_started is not None:
+                    self.time_to_first_audio.append(started - self.burst_started)
+                    self.tracer.record('tts_first_audio', started - self.burst_started)
+                    self.burst_started = None
+                elif self.last_play_end is not None:
+                    self.chunk_gaps.append(started - self.last_play_end)
+                    self.tracer.record('tts_gap', started - self.last_play_end)
+            if audio is not None:
+                try:
+                    self.backend.play(audio)
+                except Exception as e:
+                    print(f"Error playing speech with {self.backend.name}: {e}")
+                finally:
+                    self.backend.cleanup(audio)
+            self.chunk_done(generation)
+    
+    def chunk_done(self, generation):
+        with self.lock:
+            self.pending -= 1
+            self.last_play_end = time.monotonic()
+            if generation != self.generation:
+                self.stale -= 1
+                self.last_play_end = None
+                if self.stale == 0 and self.interrupted_at is not None:
+                    latency = time.monotonic() - self.interrupted_at
+                    self.interrupt_latencies.append(latency)
+                    self.tracer.record('tts_interrupt', latency)
+                    self.interrupted_at = None
+            if self.pending == 0:
+                self.last_play_end = None
+                self.idle.set()
+    
+    def metrics(self):
+        """Time-to-first-audio, inter-chunk gap and interrupt latency summary in seconds"""
+        def summary(values):
+            if not values:
+                return None
+            ordered = sorted(values)
+            return {'count': len(ordered), 'mean': sum(ordered) / len(ordered),
+                    'p50': ordered[len(ordered) // 2], 'max': ordered[-1]}
+        with self.lock:
+            return {'backend': self.backend.name,
+                    'time_to_first_audio': summary(self.time_to_first_audio),
+                    'chunk_gaps': summary(self.chunk_gaps),
+                    'interrupt': summary(self.interrupt_latencies)}
+
 class VoiceControlGUI:
     def __init__(self, callback):
         self.callback = callback
         self.is_listening = False
+        self.updates = queue.Queue()  # Status text from worker threads, applied on the Tk thread
         self.root = tk.Tk()
         self.root.title("Voice Control")
         self.root.geometry("300x150")
@@ -72,70 +2882,232 @@ class VoiceControlGUI:
         # Instructions
         instructions = ttk.Label(main_frame, text="Hold button or SPACE to talk", font=('Arial', 9))
         instructions.pack()
+        self.root.after(50, self.drain_updates)
         
+    # The callback returns immediately: recording is already running and turns
+    # are handed to the agent's TurnScheduler, so no thread is spawned per event
     def start_listening(self, event=None):
         if not self.is_listening:
             self.is_listening = True
             self.talk_button.config(text="🔴 Listening...", bg='#f44336')
             self.status_label.config(text="Listening... Speak now!")
-            threading.Thread(target=self.callback, args=('start',), daemon=True).start()
+            self.callback('start')
     
     def stop_listening(self, event=None):
         if self.is_listening:
             self.is_listening = False
             self.talk_button.config(text="🎤 Hold to Talk", bg='#4CAF50')
             self.status_label.config(text="Processing...")
-            threading.Thread(target=self.callback, args=('stop',), daemon=True).start()
+            self.callback('stop')
     
     def update_status(self, status):
-        self.status_label.config(text=status)
+        """Safe to call from any thread; the label changes on the next drain"""
+        self.updates.put(status)
+    
+    def drain_updates(self):
+        try:
+            while True:
+                status = self.updates.get_nowait()
+                if not self.is_listening:  # Keep "Listening..." up while the button is held
+                    self.status_label.config(text=status)
+        except queue.Empty:
+            pass
+        self.root.after(50, self.drain_updates)
     
     def run(self):
         self.root.mainloop()
 
+class HeadlessStatus:
+    """Stand-in for VoiceControlGUI when the agent runs without a window"""
+    
+    def update_status(self, status):
+        logger.debug(f"Status: {status}")
+    
+    def run(self):
+        pass
+
+# URL patterns the lean browser profile never fetches: images, web fonts, media and
+# third-party analytics/ads/embeds. Text, styles, scripts and SVG icons still load.
+LEAN_BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.bmp', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mov', '*.mp3', '*.wav', '*.ogg',
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*clarity.ms*', '*linkedin.com/insight*',
+    '*youtube.com/embed*', '*player.vimeo.com*', '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+]
+
+def lean_blocked_url_patterns(allow=None):
+    """Blocked patterns minus anything matching the allow-list (AGENT_ALLOW_RESOURCES, comma-separated)"""
+    if allow is None:
+        allow = os.getenv('AGENT_ALLOW_RESOURCES', '')
+    allowed = [a.strip().lower() for a in allow.split(',') if a.strip()]
+    return [p for p in LEAN_BLOCKED_URL_PATTERNS if not any(a in p for a in allowed)]
+
+@functools.lru_cache(maxsize=1)
+def find_chromedriver():
+    """CHROMEDRIVER_PATH, then PATH, then ./chromedriver; None lets Selenium Manager resolve one"""
+    for candidate in (os.getenv('CHROMEDRIVER_PATH'), shutil.which('chromedriver'), './chromedriver'):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return None
+
+def build_chrome_driver(headless=False, lean=None, profile_dir=None):
+    """Launch Chrome with the agent's options; raises if Chrome or ChromeDriver cannot start
+    
+    lean (default: AGENT_LEAN_BROWSER, else on when headless) uses the eager page-load
+    strategy and blocks heavy and third-party resources over CDP. profile_dir keeps a
+    warm user-data directory, so HTTP cache and cookies survive restarts.
+    """
+    if lean is None:
+        lean = os.getenv('AGENT_LEAN_BROWSER', '1' if headless else '0') == '1'
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1366,900")
+    else:
+        chrome_options.add_argument("--start-maximized")
+    if lean:
+        # driver.get() returns at DOMContentLoaded; PageReadiness decides when it is usable
+        chrome_options.page_load_strategy = 'eager'
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--no-first-run")
+    chrome_options.add_argument("--no-default-browser-check")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    
+    chromedriver_path = find_chromedriver()
+    if chromedriver_path:
+        service = Service(executable_path=chromedriver_path)
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+    else:
+        driver = webdriver.Chrome(options=chrome_options)
+    
+    if lean:
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': lean_blocked_url_patterns()})
+        except Exception as e:
+            print(f"⚠️ Resource blocking unavailable: {e}")
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    return driver
+
+def profile_in_use(profile_dir):
+    """True if a running Chrome holds the profile's SingletonLock (a symlink to "<host>-<pid>")"""
+    try:
+        owner = os.readlink(os.path.join(profile_dir, 'SingletonLock'))
+    except OSError:
+        return False  # No lock, or a platform that does not use the symlink
+    host, _, pid = owner.rpartition('-')
+    if host != socket.gethostname():
+        return True  # Another machine on a shared home directory; Chrome will refuse it too
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False  # Stale lock from a crash; Chrome clears it itself
+    except (ValueError, OSError):
+        pass
+    return True
+
 class AIVoiceWebAgent:
-    def __init__(self):
-        """Initialize the Enhanced AI Voice Web Agent"""
-        self.website_url = "https://www.ikf.co.in/"
+    def __init__(self, api_key=None, website_url="https://www.ikf.co.in/", groq_url=None,
+                 use_gui=True, use_microphone=True, headless=False, tts_backend=None, cache_dir=CACHE_DIR,
+                 stage_workers=4):
+        """Initialize the Enhanced AI Voice Web Agent
+        
+        The defaults give the interactive desktop agent. Benchmarks and servers pass
+        an explicit api_key, use_gui=False and use_microphone=False so nothing blocks
+        on console input or opens an audio device.
+        """
+        self.website_url = website_url
+        self.headless = headless or os.getenv('AGENT_HEADLESS') == '1'
+        self.browser_profile_dir = os.path.join(cache_dir, 'chrome-profile')  # Warm cache across runs
+        self.temp_profile_dir = None  # Used instead when another agent holds the warm profile
+        self.tracer = Tracer.from_env()
         self.driver = None
+        self.driver_lock = threading.RLock()  # One WebDriver command sequence at a time
+        self.browser_ready = threading.Event()  # Set once the start page is open (or startup failed)
+        self.startup_timeline = None
+        self.startup_complete = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=stage_workers, thread_name_prefix='turn-stage')
+        # LLM requests get their own pool: one abandoned by a barge-in can hold a thread for the
+        # whole LatencyBudget, and must not queue page extraction or the next turn behind it
+        self.llm_executor = ThreadPoolExecutor(max_workers=2 * stage_workers, thread_name_prefix='llm-request')
+        self.scheduler = TurnScheduler(self.tracer)  # One voice turn at a time; a new press cancels it
+        self.last_timeline = None
+        self.readiness = None
         self.listening = False
-        self.current_page_content = ""
+        self.current_page_content = None  # Latest PageSnapshot of the open page
+        self.page_model_version = None  # Version of the in-browser page model we last synced
+        self.job_index = None  # JobIndex over the current snapshot's job listings
         self.conversation_history = []
         self.current_context = {}  # Store current context (jobs, forms, etc.)
+        self.applicant_profile_path = (os.getenv('AGENT_APPLICANT_PROFILE') or
+                                       os.path.join(cache_dir, 'applicant.json'))  # For application forms
         self.is_recording = False
-        self.audio_data = None
         
         # Initialize speech recognition
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.microphone = sr.Microphone() if use_microphone else None
+        self.stt = create_speech_backend(os.getenv('AGENT_STT_BACKEND'), self.recognizer)
+        self.max_recording_seconds = 10
+        self.capture = AudioCapture(self.microphone, self.recognizer,
+                                    max_utterance_seconds=self.max_recording_seconds,
+                                    tracer=self.tracer) if self.microphone else None
+        self.hands_free = os.getenv('AGENT_HANDS_FREE') == '1'  # Voice activity detection instead of push-to-talk
         
-        # Use macOS built-in TTS
-        self.use_macos_say = sys.platform == "darwin"
+        # Speech output: macOS say, espeak-ng/pyttsx3 on Linux, or AGENT_TTS_BACKEND=null
+        if not isinstance(tts_backend, TTSBackend):
+            tts_backend = create_tts_backend(tts_backend or os.getenv('AGENT_TTS_BACKEND'))
+        self.speech = SpeechOutput(tts_backend, tracer=self.tracer)
         
         # Groq API setup
         self.groq_api_key = None
-        self.groq_url = "https://api.groq.com/openai/v1/chat/completions"
-        
-        # Website context
-        self.website_context = {
-            'company_name': 'I Knowledge Factory',
-            'website_url': 'https://www.ikf.co.in/',
-            'available_pages': ['home', 'about', 'services', 'career', 'contact', 'portfolio', 'blog', 'team'],
-            'main_services': ['web development', 'mobile app development', 'digital marketing', 'IT consulting']
-        }
+        self.groq_url = groq_url or "https://api.groq.com/openai/v1/chat/completions"
+        self.llm = None
+        self.stream_responses = True  # Speak sentences as soon as the LLM streams them
+        self.model_router = ModelRouter()
+        self.race_models = os.getenv('AGENT_MODEL_RACE') == '1'  # Ask both models for turns that may escalate
+        self.llm_usage = deque(maxlen=LLM_USAGE_HISTORY)  # Per completion request: model, route reason, tokens, seconds
+        self.retriever = ContextRetriever()
+        self.response_cache = ResponseCache(os.path.join(cache_dir, 'responses.json'))
+        
+        # Website context from sites/<host>.json (generic defaults for other sites)
+        self.website_context = load_website_context(website_url)
+        
+        # Page names -> verified URLs, discovered from the site's own navigation. The
+        # cached map for this site is usable at once; every crawl revalidates it and
+        # recompiles the intent matcher for navigation/apply commands along with it.
+        host = urlparse(website_url).netloc.lower()
+        self.navigation_path = os.path.join(cache_dir, 'navigation', f"{host}.json")
+        self.site_map = SiteMap(NavigationIndex.load(self.navigation_path), self.website_context['job_keywords'])
+        self.website_context['available_pages'] = self.site_map.navigation.page_names()
+        
+        # Prompt builder: stable instruction prefix plus token-budgeted per-turn context
+        self.prompt_builder = PromptBuilder(self.website_context, self.retriever)
+        self.conversation_summary = ""  # Rolling summary of turns older than the recent window
+        
+        # Background crawler so answers can use pages that are not open in the browser
+        self.crawler = SiteCrawler(self.website_url, [self.website_url] + self.site_map.navigation.urls(),
+                                   SnapshotStore(os.path.join(cache_dir, 'pages')),
+                                   on_update=self.refresh_navigation)
         
         # Get API key first
-        self.get_groq_api_key()
+        self.get_groq_api_key(api_key)
         
         # Setup GUI
-        self.gui = VoiceControlGUI(self.handle_voice_control)
+        self.gui = VoiceControlGUI(self.handle_voice_control) if use_gui else HeadlessStatus()
         
-        # Calibrate microphone
-        self.calibrate_microphone()
 
-    def get_groq_api_key(self):
-        """Get Groq API key from environment or prompt user"""
-        api_key = os.getenv('GROQ_API_KEY')
+    def get_groq_api_key(self, api_key=None):
+        """Get Groq API key from the argument, environment or prompt user"""
+        api_key = api_key or os.getenv('GROQ_API_KEY')
         
         if not api_key:
             print("\n" + "="*50)
@@ -159,19 +3131,16 @@ class AIVoiceWebAgent:
             print("Warning: API key doesn't start with 'gsk_'. Please verify it's correct.")
         
         self.groq_api_key = api_key
+        self.llm = GroqClient(api_key, self.groq_url)
         print(f"✅ API key configured (ends with: ...{api_key[-8:]})")
         return api_key
 
     def test_groq_connection(self):
         """Test the Groq API connection with a simple request"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            
+            # The small model answers a ping just as well, and much faster
             data = {
-                "model": "llama-3.3-70b-versatile",
+                "model": self.model_router.fast_model,
                 "messages": [
                     {"role": "user", "content": "Hello, can you respond with just 'Connection test successful'?"}
                 ],
@@ -179,7 +3148,8 @@ class AIVoiceWebAgent:
                 "max_tokens": 20
             }
             
-            response = requests.post(self.groq_url, headers=headers, json=data, timeout=10)
+            # Also opens the pooled connection later turns will reuse
+            response = self.llm.chat(data, budget=LatencyBudget(total=10.0, connect=3.0, first_byte=8.0))
             
             if response.status_code == 200:
                 result = response.json()
@@ -194,267 +3164,348 @@ class AIVoiceWebAgent:
             print(f"❌ Groq API connection error: {e}")
             return False
 
+    @uses_driver
     def extract_detailed_page_content(self):
         """Extract detailed content from current page including job details, forms, etc."""
         try:
-            WebDriverWait(self.driver, 5).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            content = {
-                'title': self.driver.title,
-                'url': self.driver.current_url,
-                'headings': [],
-                'job_listings': [],
-                'forms': [],
-                'buttons': [],
-                'main_content': '',
-                'page_type': 'general'
-            }
+            cached = self.current_page_content
+            known_version = self.page_model_version if cached else None
             
-            # Get headings
-            headings = self.driver.find_elements(By.CSS_SELECTOR, "h1, h2, h3, h4")
-            content['headings'] = [h.text.strip() for h in headings if h.text.strip()]
-            
-            # Check if this is a career page
-            if 'career' in self.driver.current_url.lower():
-                content['page_type'] = 'career'
-                
-                # Extract job listings
-                job_elements = self.driver.find_elements(By.CSS_SELECTOR, 
-                    ".job-listing, .career-item, .position, [class*='job'], [class*='position'], [class*='opening']")
+            with self.tracer.span('extract_snapshot') as span:
+                # One injected call: unchanged pages return no sections, changed pages only a delta
+                result = self.driver.execute_script(
+                    PAGE_MODEL_SCRIPT, JOB_SELECTOR, APPLY_BUTTON_SELECTOR, MAIN_CONTENT_LIMIT, known_version,
+                    JOB_TITLE_SELECTOR)
                 
-                for job in job_elements:
-                    job_info = {
-                        'title': '',
-                        'description': '',
-                        'requirements': '',
-                        'duration': '',
-                        'location': '',
-                        'element': job
-                    }
-                    
-                    # Try to extract job title
-                    title_elem = job.find_elements(By.CSS_SELECTOR, "h1, h2, h3, h4, .title, .job-title")
-                    if title_elem:
-                        job_info['title'] = title_elem[0].text.strip()
-                    
-                    # Get job description/details
-                    job_info['description'] = job.text.strip()
-                    
-                    if job_info['title'] or len(job_info['description']) > 20:
-                        content['job_listings'].append(job_info)
-                
-                # Look for apply buttons or forms
-                apply_buttons = self.driver.find_elements(By.CSS_SELECTOR, 
-                    "button[class*='apply'], a[class*='apply'], .apply-btn, [href*='apply']")
-                content['buttons'] = [{'text': btn.text.strip(), 'element': btn} for btn in apply_buttons]
-            
-            # Get forms
-            forms = self.driver.find_elements(By.TAG_NAME, "form")
-            for form in forms:
-                form_info = {
-                    'inputs': [],
-                    'element': form
-                }
-                inputs = form.find_elements(By.CSS_SELECTOR, "input, textarea, select")
-                for inp in inputs:
-                    form_info['inputs'].append({
-                        'type': inp.get_attribute('type'),
-                        'name': inp.get_attribute('name'),
-                        'placeholder': inp.get_attribute('placeholder'),
-                        'element': inp
-                    })
-                content['forms'].append(form_info)
-            
-            # Get main content
-            body = self.driver.find_element(By.TAG_NAME, "body")
-            content['main_content'] = body.text[:2000]
+                if result is None:
+                    # Document has no body yet - wait for it, then sync again
+                    WebDriverWait(self.driver, 5).until(
+                        EC.presence_of_element_located((By.TAG_NAME, "body"))
+                    )
+                    result = self.driver.execute_script(
+                        PAGE_MODEL_SCRIPT, JOB_SELECTOR, APPLY_BUTTON_SELECTOR, MAIN_CONTENT_LIMIT, known_version,
+                        JOB_TITLE_SELECTOR)
+                span['delta_sections'] = len(result['sections'])
+            
+            # Unchanged sections keep the previous snapshot's (immutable) values
+            base = EMPTY_SNAPSHOT if result['full'] or not cached else cached
+            content = base._replace(**snapshot_fields(result['sections'])) if result['sections'] else base
             
             self.current_page_content = content
+            self.page_model_version = result['version']
             return content
             
         except Exception as e:
             print(f"⚠️ Error extracting detailed page content: {e}")
-            return {'page_type': 'general', 'main_content': '', 'job_listings': [], 'forms': []}
+            self.page_model_version = None
+            return EMPTY_SNAPSHOT
 
-    def get_ai_response(self, user_input, detailed_content=None):
-        """Get intelligent response from Groq LLM with enhanced context"""
+    def get_ai_response(self, user_input, detailed_content=None, on_sentence=None):
+        """Get intelligent response from Groq LLM with enhanced context
+        
+        When on_sentence is given the completion is streamed and every complete
+        sentence is passed to it as soon as it arrives; the full text is still
+        returned (and stored in the conversation history) once the stream ends.
+        """
         try:
             if not detailed_content:
                 detailed_content = self.extract_detailed_page_content()
             
-            # Build enhanced context-aware prompt
-            context_info = ""
-            if detailed_content['page_type'] == 'career':
-                context_info = f"""
-CURRENT PAGE: Career page with job listings
-AVAILABLE JOBS: {json.dumps([job['title'] + ': ' + job['description'][:200] for job in detailed_content['job_listings']], indent=2)}
-APPLY BUTTONS AVAILABLE: {len(detailed_content['buttons']) > 0}
-"""
-            
-            conversation_context = ""
-            if self.conversation_history:
-                recent_conv = self.conversation_history[-3:]
-                conversation_context = f"RECENT CONVERSATION:\n{json.dumps(recent_conv, indent=2)}"
+            # Answer repeated questions about an unchanged page without touching the network
+            page_url = normalize_url(detailed_content.url or self.website_url)
+            page_hash = page_content_hash(detailed_content)
+            cacheable = self.response_cache.cacheable(user_input)
+            cached_response = cacheable and self.response_cache.get(page_url, page_hash, user_input)
+            if cached_response:
+                print("⚡ Answer served from response cache")
+                if on_sentence:
+                    splitter = SentenceSplitter()
+                    for sentence in splitter.feed(cached_response) + [splitter.flush()]:
+                        if sentence:
+                            on_sentence(sentence)
+                self.remember_exchange(user_input, cached_response, detailed_content)
+                return cached_response
             
-            system_prompt = f"""You are an intelligent voice assistant for the {self.website_context['company_name']} website.
-
-ENHANCED CAPABILITIES:
-- Answer questions about company, services, jobs with specific details from current page
-- Navigate to different pages intelligently
-- Help with job applications by finding specific jobs and application forms
-- Remember conversation context and refer to previous discussions
-- Extract and provide specific information from current page content
-
-CURRENT PAGE DETAILS:
-- URL: {detailed_content.get('url', 'unknown')}
-- Page Type: {detailed_content.get('page_type', 'general')}
-- Title: {detailed_content.get('title', '')}
-- Main Headings: {', '.join(detailed_content.get('headings', [])[:3])}
-
-{context_info}
-
-{conversation_context}
-
-IMPORTANT INSTRUCTIONS:
-1. If user asks about specific jobs (like "AI LLM intern"), provide details from the job listings above
-2. If user wants to apply for a job, guide them to the specific application process
-3. Remember what we discussed before - refer to previous context
-4. Be specific about job details (duration, requirements, etc.) when available
-5. Keep responses conversational but informative (2-3 sentences max)
-6. If you need to perform actions (navigate, click apply), mention them clearly
-
-Current page content: {detailed_content.get('main_content', '')[:800]}"""
+            # Build a compact, token-budgeted prompt behind a stable instruction prefix
+            other_pages_context = self.get_related_page_context(user_input, detailed_content)
+            messages, prompt_tokens = self.prompt_builder.build(
+                user_input, detailed_content, self.conversation_history, self.conversation_summary,
+                other_pages_context)
+            logger.info(f"Prompt: {prompt_tokens} tokens (budget {self.prompt_builder.token_budget})")
 
-            headers = {
-                "Authorization": f"Bearer {self.groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "model": "llama-3.3-70b-versatile",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 400,
-                "top_p": 1,
-                "stream": False
-            }
+            # Small model for simple turns, the large one when the turn needs it
+            route = self.model_router.route(user_input, self.site_map.intent_router.classify(user_input),
+                                            bool(self.conversation_history))
+            logger.info(f"Model: {route.model} ({route.reason})")
+            ai_response = self.complete(messages, prompt_tokens, route, on_sentence)
             
-            response = requests.post(self.groq_url, headers=headers, json=data, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result['choices'][0]['message']['content']
-                
-                # Store conversation with context
-                self.conversation_history.append({
-                    "user": user_input, 
-                    "assistant": ai_response,
-                    "page_context": detailed_content.get('page_type', 'general'),
-                    "timestamp": time.time()
-                })
-                
-                # Keep only last 8 conversations
-                if len(self.conversation_history) > 8:
-                    self.conversation_history = self.conversation_history[-8:]
-                
+            if ai_response is not None:
+                self.remember_exchange(user_input, ai_response, detailed_content)
+                # Answers that drew on other pages depend on what the crawler held at the time
+                if cacheable and not other_pages_context and ai_response.strip():
+                    self.response_cache.put(page_url, page_hash, user_input, ai_response)
                 return ai_response
-            else:
-                print(f"Groq API error: {response.status_code}")
-                print(f"Error details: {response.text}")
-                return "I'm having trouble accessing my AI capabilities right now."
+            ai_response = "I'm having trouble accessing my AI capabilities right now."
                 
+        except TurnCancelled:
+            raise
         except Exception as e:
+            self.scheduler.check()  # A stream closed by barge-in is not an error to speak
             print(f"AI response error: {e}")
-            return "I'm experiencing some technical difficulties."
+            ai_response = "I'm experiencing some technical difficulties."
+        
+        if on_sentence:
+            on_sentence(ai_response)
+        return ai_response
 
-    def extract_actions_from_response(self, ai_response, user_input):
-        """Extract and prioritize actions from AI response and user input"""
-        actions = []
-        response_lower = ai_response.lower()
-        user_lower = user_input.lower()
-        
-        # High priority: Direct job application requests
-        if any(phrase in user_lower for phrase in ['apply for', 'want to apply', 'application']):
-            # Check for specific job mentions
-            job_keywords = ['ai', 'llm', 'intern', 'developer', 'designer', 'marketing']
-            for keyword in job_keywords:
-                if keyword in user_lower:
-                    actions.append(("apply_for_job", keyword))
-                    break
-            
-            if not any(action[0] == "apply_for_job" for action in actions):
-                actions.append(("show_jobs", ""))
+    def complete(self, messages, prompt_tokens, route, on_sentence=None, budget=None):
+        """Completion from the routed model, moving to the large model if the small one hedges
         
-        # Navigation requests
-        for page in self.website_context['available_pages']:
-            if (f"navigate to {page}" in response_lower or f"go to {page}" in response_lower or 
-                f"visit {page}" in response_lower or f"{page} page" in user_lower):
-                actions.append(("navigate", page))
+        With race_models the large model is asked at the same time for turns that may
+        escalate, so escalating costs no extra round trip; its answer is dropped when
+        the small one stands. Returns None when the API keeps failing.
+        """
+        budget = budget or LatencyBudget()
+        large = self.model_router.large
+        race = None
+        if route.escalate and self.race_models:
+            raced_at = time.monotonic()
+            race = self.llm_executor.submit(self.llm.chat, self.completion_payload(messages, large, on_sentence),
+                                            budget, on_sentence is not None)
+        try:
+            answer = self.request_completion(messages, prompt_tokens, route, on_sentence, budget)
+            if answer is None and route.model != large.model:
+                raise LowConfidence()  # Small model unavailable on this endpoint
+        except LowConfidence:
+            print(f"↗️ {route.model} was not confident, asking {large.model}")
+            response = None
+            if race:
+                response = self.scheduler.wait_abandonable(race, dispose=lambda r: r.close())
+                race = None
+            return self.request_completion(messages, prompt_tokens, large, on_sentence, budget, response)
+        finally:
+            if race:
+                race.add_done_callback(functools.partial(
+                    self.discard_race, large, prompt_tokens, raced_at, on_sentence is not None))
+        return answer
+
+    def discard_race(self, route, prompt_tokens, raced_at, streamed, future):
+        """Record the cost of a raced request whose answer was not needed, then close it
         
-        # Context-specific actions
-        if any(word in user_lower for word in ["career", "job", "position", "hiring", "opening"]):
-            if "navigate" not in [action[0] for action in actions]:
-                actions.append(("navigate", "career"))
+        A whole answer reports its own usage. A stream is dropped unread, so it is
+        counted at the route's token cap - the most the endpoint can bill for it.
+        """
+        if future.exception() is not None:
+            return
+        response = future.result()
+        try:
+            if response.status_code != 200:
+                completion_tokens = 0
+            elif streamed:
+                completion_tokens = route.max_tokens
+            else:
+                data = response.json()
+                completion_tokens = data.get('usage', {}).get('completion_tokens') or estimate_tokens(
+                    data['choices'][0]['message']['content'])
+            self.record_usage(route.model, 'raced', prompt_tokens, completion_tokens, time.monotonic() - raced_at)
+        except Exception as e:
+            logger.debug(f"Could not read raced response: {e}")
+        finally:
+            response.close()
+
+    def completion_payload(self, messages, route, on_sentence=None):
+        return {
+            "model": route.model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": route.max_tokens,
+            "top_p": 1,
+            "stream": on_sentence is not None
+        }
+
+    def request_completion(self, messages, prompt_tokens, route, on_sentence, budget, response=None):
+        """One completion request (or an already started one); raises LowConfidence if an escalating answer hedges"""
+        started = time.monotonic()
+        if response is None:
+            response = self.scheduler.run_abandonable(
+                self.llm_executor, self.llm.chat, self.completion_payload(messages, route, on_sentence), budget,
+                on_sentence is not None, dispose=lambda r: r.close())
+        if response.status_code != 200:
+            print(f"Groq API error ({route.model}): {response.status_code}")
+            print(f"Error details: {response.text}")
+            return None
         
-        if any(word in user_lower for word in ["contact", "reach out", "get in touch"]):
-            actions.append(("navigate", "contact"))
+        if on_sentence:
+            # An escalating turn's first sentence is checked before anything is spoken
+            emit = FirstSentenceGate(on_sentence, self.model_router.hedges) if route.escalate else on_sentence
+            try:
+                # Barge-in closes the stream so a blocked read returns at once
+                with self.scheduler.on_cancel(response.close):
+                    answer = self.read_streamed_response(response, emit, budget)
+                if route.escalate:
+                    emit.finish()
+            except LowConfidence:
+                response.close()
+                self.record_usage(route.model, 'hedged', prompt_tokens, estimate_tokens(' '.join(emit.seen)),
+                                  time.monotonic() - started)
+                raise
+        else:
+            answer = response.json()['choices'][0]['message']['content']
+            self.tracer.record('llm_ttft', time.monotonic() - budget.started_at, streamed=False)
+            if route.escalate and self.model_router.hedges(answer):
+                self.record_usage(route.model, 'hedged', prompt_tokens, estimate_tokens(answer),
+                                  time.monotonic() - started)
+                raise LowConfidence()
+        self.record_usage(route.model, route.reason, prompt_tokens, estimate_tokens(answer), time.monotonic() - started)
+        return answer
+
+    def record_usage(self, model, reason, prompt_tokens, completion_tokens, seconds):
+        self.llm_usage.append({'model': model, 'reason': reason, 'prompt_tokens': prompt_tokens,
+                               'completion_tokens': completion_tokens, 'seconds': round(seconds, 4)})
+        self.tracer.record('llm_request', seconds, model=model, reason=reason)
+
+    def model_usage_report(self):
+        """Requests, tokens and route reasons per model"""
+        report = {}
+        for usage in self.llm_usage:
+            entry = report.setdefault(usage['model'], {'requests': 0, 'prompt_tokens': 0,
+                                                       'completion_tokens': 0, 'reasons': Counter()})
+            entry['requests'] += 1
+            entry['prompt_tokens'] += usage['prompt_tokens']
+            entry['completion_tokens'] += usage['completion_tokens']
+            entry['reasons'][usage['reason']] += 1
+        return {model: dict(entry, reasons=dict(entry['reasons'])) for model, entry in report.items()}
+
+    def remember_exchange(self, user_input, ai_response, detailed_content):
+        """Store a conversation turn with its page context"""
+        self.conversation_history.append({
+            "user": user_input, 
+            "assistant": ai_response,
+            "page_context": detailed_content.page_type,
+            "timestamp": time.time()
+        })
         
-        if any(word in user_lower for word in ["service", "what we do", "offerings"]):
-            actions.append(("navigate", "services"))
+        # Turns leaving the verbatim window are folded into the rolling summary
+        window = self.prompt_builder.recent_turns
+        if len(self.conversation_history) > window:
+            self.conversation_summary = self.prompt_builder.fold_into_summary(
+                self.conversation_summary, self.conversation_history[-window - 1])
         
-        if any(word in user_lower for word in ["portfolio", "work", "projects"]):
-            actions.append(("navigate", "portfolio"))
+        # Keep only last 8 conversations
+        if len(self.conversation_history) > 8:
+            self.conversation_history = self.conversation_history[-8:]
+
+    def get_related_page_context(self, user_input, detailed_content):
+        """Context from crawled snapshots of other pages the user mentions, without navigating"""
+        current_url = normalize_url(detailed_content.url or self.website_url)
+        sections = []
+        seen_urls = {current_url}
+        for page_key, url in self.site_map.navigation.mentioned(user_input):
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            snapshot = self.crawler.lookup(url)
+            if snapshot:
+                passages = self.retriever.select(snapshot, user_input, self.prompt_builder.related_pages_budget)
+                sections.append(f"{page_key.upper()} PAGE ({url}): {' ... '.join(passages)}")
+        if not sections:
+            return ""
+        return "OTHER PAGES (from site crawl):\n" + "\n".join(sections)
+
+    def read_streamed_response(self, response, on_sentence, budget=None):
+        """Consume an SSE completion stream, emitting sentences as they complete"""
+        splitter = SentenceSplitter()
+        parts = []
+        for line in response.iter_lines(decode_unicode=True):
+            self.scheduler.check()
+            if budget and budget.expired():
+                response.close()
+                raise requests.Timeout("LLM stream exceeded the turn deadline")
+            if not line or not line.startswith('data:'):
+                continue
+            payload = line[len('data:'):].strip()
+            if payload == '[DONE]':
+                break
+            choices = json.loads(payload).get('choices') or [{}]
+            token = (choices[0].get('delta') or {}).get('content')
+            if token:
+                if not parts and budget:
+                    self.tracer.record('llm_ttft', time.monotonic() - budget.started_at, streamed=True)
+                parts.append(token)
+                for sentence in splitter.feed(token):
+                    on_sentence(sentence)
+        remainder = splitter.flush()
+        if remainder:
+            on_sentence(remainder)
+        return ''.join(parts)
+
+    def extract_actions_from_response(self, ai_response, user_input):
+        """Extract and prioritize actions from AI response and user input"""
+        user_intents = self.site_map.intent_router.classify(user_input)
         
-        return actions
+        # Job application requests first, then navigation the LLM announced or the
+        # user asked for explicitly, then pages implied by topic words
+        explicit = [i for i in user_intents if i.confidence > 0.6]
+        implied = [i for i in user_intents if i.confidence <= 0.6]
+        response_navigation = self.site_map.intent_router.classify_response(ai_response)
+        if response_navigation:
+            implied = [i for i in implied if i.value != 'career']
+        intents = IntentRouter.dedupe(explicit + response_navigation + implied)
+        return [(intent.action, intent.value) for intent in intents]
+
+    def job_index_for(self, content):
+        """Job index for a snapshot, rebuilt only when its job listings change"""
+        listings = content.job_listings
+        if self.job_index is None or self.job_index.listings != listings:
+            self.job_index = JobIndex(listings)
+        return self.job_index
 
+    @uses_driver
     def apply_for_job(self, job_keyword):
         """Handle job application process"""
         try:
             detailed_content = self.extract_detailed_page_content()
             
             # First, ensure we're on the career page
-            if detailed_content['page_type'] != 'career':
+            if detailed_content.page_type != 'career':
                 self.navigate_to_page('career')
-                time.sleep(2)
                 detailed_content = self.extract_detailed_page_content()
             
-            # Find matching job
-            target_job = None
-            for job in detailed_content['job_listings']:
-                if job_keyword.lower() in job['title'].lower() or job_keyword.lower() in job['description'].lower():
-                    target_job = job
-                    break
+            # Best-ranked match from the snapshot's job index
+            target_job = self.job_index_for(detailed_content).best(job_keyword)
             
             if target_job:
-                print(f"🎯 Found job: {target_job['title']}")
+                print(f"🎯 Found job: {target_job.title}")
                 
                 # Try to click on the job or find apply button
                 try:
+                    # The snapshot only holds a locator; look the card up in the live page now
+                    job_element = resolve_locator(self.driver, target_job.locator)
+                    if job_element is None:
+                        print("❌ Job card is no longer on the page")
+                        return False
+                    
                     # Scroll to job element
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", target_job['element'])
-                    time.sleep(1)
+                    self.driver.execute_script("arguments[0].scrollIntoView(true);", job_element)
+                    self.readiness.wait(target=job_element, ceiling=1.0)
                     
                     # Look for apply button near this job
                     apply_button = None
                     try:
-                        apply_button = target_job['element'].find_element(By.CSS_SELECTOR, 
-                            "button[class*='apply'], a[class*='apply'], .apply-btn, [href*='apply']")
+                        apply_button = job_element.find_element(By.CSS_SELECTOR, APPLY_BUTTON_SELECTOR)
                     except:
                         # Look for apply button in the general area
-                        apply_buttons = self.driver.find_elements(By.CSS_SELECTOR, 
-                            "button[class*='apply'], a[class*='apply'], .apply-btn, [href*='apply']")
+                        apply_buttons = self.driver.find_elements(By.CSS_SELECTOR, APPLY_BUTTON_SELECTOR)
                         if apply_buttons:
                             apply_button = apply_buttons[0]
                     
                     if apply_button:
                         print("🔘 Clicking apply button...")
+                        # The click may load an application page or open a form in place
+                        before_click = self.readiness.mark(target='form')
                         apply_button.click()
-                        time.sleep(2)
+                        self.readiness.wait(target='form', ceiling=3.0, since=before_click)
+                        self.current_context['applied_job'] = target_job.title
                         return True
                     else:
                         print("ℹ️ No apply button found, job details displayed")
@@ -471,177 +3522,308 @@ Current page content: {detailed_content.get('main_content', '')[:800]}"""
             print(f"❌ Error in job application process: {e}")
             return False
 
+    @uses_driver
+    def fill_application_form(self, job_title=''):
+        """Fill the open application form from the applicant profile; return what to tell the user
+        
+        The form schema comes from the page snapshot, then the whole form is filled
+        in one script call and checked in one more, however many fields it has. The
+        form is never submitted; the user reviews it first.
+        """
+        profile = load_applicant_profile(self.applicant_profile_path) if self.applicant_profile_path else {}
+        if not profile:
+            print("ℹ️ No applicant profile, leaving the application form empty")
+            return ""
+        try:
+            content = self.extract_detailed_page_content()
+            plan = FormMapper(profile).best_plan(content.forms, {'position': job_title} if job_title else None)
+            if not plan:
+                print("ℹ️ No application form fields match the applicant profile")
+                return ""
+            
+            with self.tracer.span('form_fill', fields=len(plan)):
+                statuses = self.driver.execute_script(
+                    FORM_FILL_SCRIPT, [[m.field.locator.css, m.field.locator.fingerprint, m.value] for m in plan])
+                report = self.driver.execute_script(FORM_VALIDATE_SCRIPT)
+            
+            for match, status in zip(plan, statuses):
+                if status not in ('filled', 'skipped'):
+                    print(f"⚠️ Could not fill {match.field.label or match.field.name} ({status})")
+            needs = [name for name, _ in report['invalid']] + report['missing']
+            print(f"📝 Filled {report['filled']} form fields; still needed: {needs or 'nothing'}")
+            summary = f"I've filled in {report['filled']} fields of the application form"
+            if needs:
+                summary += f", but it still needs your {', '.join(needs[:3]).lower()}"
+            return summary + ". Please check it before you submit."
+        except Exception as e:
+            print(f"⚠️ Error filling the application form: {e}")
+            return ""
+
     def handle_voice_control(self, action):
-        """Handle voice control from GUI"""
+        """Handle voice control from GUI (called on the Tk thread; returns immediately)"""
         if action == 'start':
+            self.interrupt_turn()
             self.start_recording()
         elif action == 'stop':
             self.stop_recording_and_process()
 
+    def interrupt_turn(self):
+        """Barge-in: cancel the turn in flight and cut its speech off"""
+        self.scheduler.interrupt()
+        self.speech.interrupt()
+
     def start_recording(self):
-        """Start recording audio"""
+        """Mark the start of an utterance in the always-open capture stream (returns immediately)"""
         if not self.is_recording:
             self.is_recording = True
             try:
-                with self.microphone as source:
-                    print("🎤 Recording... Speak now!")
-                    # Start listening in a separate thread
-                    self.audio_data = self.recognizer.listen(source, timeout=1, phrase_time_limit=10)
+                self.capture.start()  # No-op unless the press beat startup
+                self.capture.begin(self.stt)
+                print("🎤 Recording... Speak now!")
             except Exception as e:
                 print(f"Recording error: {e}")
                 self.is_recording = False
 
     def stop_recording_and_process(self):
-        """Stop recording and process the audio"""
-        if self.is_recording and self.audio_data:
+        """Stop recording and hand the utterance to the turn scheduler"""
+        if self.is_recording:
             self.is_recording = False
-            try:
-                print("🔄 Processing speech...")
-                command = self.recognizer.recognize_google(self.audio_data).lower()
-                print(f"👤 You said: '{command}'")
-                
-                # Update GUI
-                self.gui.update_status("Processing command...")
-                
-                # Process the command
-                self.process_command(command)
-                
-                # Reset GUI
-                self.gui.update_status("Ready to listen")
-                
-            except sr.UnknownValueError:
-                print("❌ Could not understand the audio")
-                self.gui.update_status("Could not understand - try again")
-            except sr.RequestError as e:
-                print(f"❌ Error with speech recognition: {e}")
-                self.gui.update_status("Speech recognition error")
+            released_at = time.monotonic()
+            audio_data = self.capture.end()
+            if audio_data:
+                self.scheduler.submit(self.process_utterance, audio_data, released_at)
+            else:
+                print("❌ No audio was captured")
+                self.gui.update_status("Nothing heard - try again")
         else:
             self.is_recording = False
+            self.gui.update_status("Microphone unavailable - try again")
+
+    def process_utterance(self, audio_data, released_at=None):
+        """Transcribe a finished utterance and run the turn for it; returns the transcript"""
+        released_at = released_at or time.monotonic()
+        timeline = TurnTimeline(self.tracer)
+        # Refresh the page snapshot while speech recognition finishes
+        page_future = self.executor.submit(timeline.run, 'extract', self.extract_detailed_page_content)
+        try:
+            print("🔄 Processing speech...")
+            with timeline.stage('stt'):
+                command = self.stt.finish(audio_data).lower()
+            self.scheduler.check()
+            print(f"👤 You said: '{command}' ({self.stt.name}, {time.monotonic() - released_at:.2f}s after release)")
+            
+            # Update GUI
+            self.gui.update_status("Processing command...")
+            
+            # Process the command
+            self.process_command(command, timeline=timeline, page_future=page_future)
+            
+            # Reset GUI
+            self.gui.update_status("Ready to listen")
+            return command
+            
+        except sr.UnknownValueError:
+            print("❌ Could not understand the audio")
+            self.gui.update_status("Could not understand - try again")
+        except sr.RequestError as e:
+            print(f"❌ Error with speech recognition: {e}")
+            self.gui.update_status("Speech recognition error")
+        return ""
 
     def speak(self, text):
-        """Convert text to speech using macOS say command"""
+        """Queue text on the speech pipeline; returns without waiting for playback"""
+        self.scheduler.check()  # A cancelled turn says nothing more
         print(f"🤖 Agent: {text}")
-        
-        if self.use_macos_say:
-            try:
-                clean_text = re.sub(r'[^\w\s.,!?-]', '', text)
-                chunks = [clean_text[i:i+200] for i in range(0, len(clean_text), 200)]
-                for chunk in chunks:
-                    if chunk.strip():
-                        subprocess.run(['say', '-r', '200', chunk], check=True)
-            except subprocess.CalledProcessError as e:
-                print(f"Error with macOS say command: {e}")
+        self.speech.say(text)
 
     def calibrate_microphone(self):
-        """Calibrate microphone for ambient noise"""
-        print("🎤 Calibrating microphone...")
-        try:
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-                self.recognizer.energy_threshold = 300
-                self.recognizer.dynamic_energy_threshold = True
-                self.recognizer.pause_threshold = 0.8
-                self.recognizer.phrase_threshold = 0.3
-            print("✅ Microphone calibrated successfully!")
+        """Open the always-on microphone; the noise threshold then adapts in the background"""
+        print("🎤 Opening microphone...")
+        try:
+            self.recognizer.energy_threshold = 300  # Until the first second of audio seeds it
+            self.recognizer.dynamic_energy_threshold = True
+            self.recognizer.pause_threshold = 0.8
+            self.recognizer.phrase_threshold = 0.3
+            self.capture.start()
+            if self.hands_free:
+                # Ignore the agent's own voice and anything said while the talk button is held
+                self.capture.enable_hands_free(
+                    self.stt, functools.partial(self.scheduler.submit, self.process_utterance),
+                    is_suppressed=lambda: self.is_recording or not self.speech.idle.is_set())
+                print("🗣️ Hands-free mode: just start talking")
+            print("✅ Microphone ready (measuring background noise for the first second)")
         except Exception as e:
             print(f"⚠️ Microphone calibration warning: {e}")
 
     def setup_webdriver(self):
-        """Setup and configure web driver"""
-        try:
-            chrome_options = Options()
-            chrome_options.add_argument("--start-maximized")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            # Try to find ChromeDriver
-            chromedriver_paths = [
-                "./chromedriver", "/usr/local/bin/chromedriver", 
-                "/opt/homebrew/bin/chromedriver", "/usr/bin/chromedriver"
-            ]
-            
-            chromedriver_path = None
-            for path in chromedriver_paths:
-                if os.path.exists(path):
-                    chromedriver_path = path
-                    break
-            
-            if chromedriver_path:
-                service = Service(executable_path=chromedriver_path)
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            else:
-                self.driver = webdriver.Chrome(options=chrome_options)
-            
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        """Setup and configure web driver
+        
+        Uses the warm profile unless another agent's Chrome holds it (or it fails to
+        start with it), in which case a throwaway profile is used for this run.
+        """
+        try:
+            profile_dir = self.browser_profile_dir
+            if profile_dir and profile_in_use(profile_dir):
+                print(f"⚠️ Browser profile {profile_dir} is in use by another agent, using a temporary profile")
+                profile_dir = None
+            try:
+                self.driver = build_chrome_driver(self.headless, profile_dir=profile_dir or self.make_temp_profile())
+            except Exception as e:
+                if not profile_dir:
+                    raise
+                print(f"⚠️ Chrome did not start with profile {profile_dir} ({e}), retrying with a temporary profile")
+                self.driver = build_chrome_driver(self.headless, profile_dir=self.make_temp_profile())
+            self.readiness = PageReadiness(self.driver, interrupted=self.scheduler.cancelled)
+            self.tracer.instrument_driver(self.driver)
             print("✅ Web driver setup successful!")
             return True
         except Exception as e:
             logger.error(f"❌ Error setting up webdriver: {e}")
             return False
 
+    def make_temp_profile(self):
+        self.temp_profile_dir = tempfile.mkdtemp(prefix='agent-chrome-profile-')
+        return self.temp_profile_dir
+
+    def refresh_navigation(self):
+        """Rebuild the navigation map from the crawl so far and cache it for this site"""
+        crawler = self.crawler
+        anchors = [anchor for page_anchors in list(crawler.anchors.values()) for anchor in page_anchors]
+        index = NavigationIndex.build(self.website_url, dict(crawler.verified), anchors, crawler.sitemap)
+        if not index.phrases:
+            return  # Site unreachable - keep the cached map
+        if index.phrases != self.site_map.navigation.phrases:
+            self.site_map.update(index)
+            self.website_context['available_pages'] = index.page_names()
+            logger.info(f"Navigation map: {len(index.phrases)} names for {len(index.urls())} pages")
+        else:
+            self.site_map.navigation = index  # Same names; keeps the newer built_at
+        try:
+            index.save(self.navigation_path)
+        except OSError as e:
+            logger.warning(f"Could not cache navigation map: {e}")
+
+    def live_navigation(self):
+        """Navigation map from the open page's own nav links (first run, before any crawl)"""
+        anchors = self.driver.execute_script(
+            "return Array.from(document.querySelectorAll('nav a[href], header a[href], footer a[href]'))"
+            ".map(a => [a.innerText || a.getAttribute('aria-label') || '', a.href]);") or []
+        host = urlparse(self.website_url).netloc.lower()
+        anchors = [(text, normalize_url(href)) for text, href in anchors if urlparse(href).netloc.lower() == host]
+        linked = {url: url for _, url in anchors}  # Linked from the live site, so trusted as served
+        linked[normalize_url(self.website_url)] = normalize_url(self.website_url)
+        return NavigationIndex.build(self.website_url, linked, anchors)
+
+    @uses_driver
     def navigate_to_page(self, page_key):
-        """Navigate to a specific page"""
+        """Navigate to a page by spoken name, via the site's navigation map"""
         try:
-            page_mappings = {
-                'home': '/', 'about': '/about', 'services': '/services', 
-                'career': '/career', 'careers': '/career', 'contact': '/contact',
-                'portfolio': '/portfolio', 'blog': '/blog', 'team': '/team'
-            }
-            
-            if page_key in page_mappings:
-                url = self.website_url.rstrip('/') + page_mappings[page_key]
-                print(f"🌐 Navigating to: {url}")
-                self.driver.get(url)
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                time.sleep(2)
-                return True
-            return False
+            url = self.site_map.navigation.resolve(page_key)
+            if not url and self.site_map.navigation.built_at is None:
+                url = self.live_navigation().resolve(page_key)
+            if not url:
+                print(f"❓ This site has no page called '{page_key}'")
+                return False
+            if normalize_url(self.driver.current_url) == url:
+                return True  # Already there; no reload
+            print(f"🌐 Navigating to: {url}")
+            self.driver.get(url)
+            self.readiness.wait(ceiling=10.0)
+            return True
         except Exception as e:
             logger.error(f"❌ Error navigating to {page_key}: {e}")
             return False
 
-    def process_command(self, command):
-        """Process voice commands using enhanced AI"""
+    def is_exit_command(self, command):
+        return any(keyword in command for keyword in ['stop', 'exit', 'quit', 'goodbye', 'bye'])
+
+    def process_command(self, command, timeline=None, page_future=None):
+        """Process voice commands using enhanced AI
+        
+        Independent stages overlap: the page snapshot may already be in flight
+        (page_future), confident navigation starts while the LLM generates, and
+        the answer is spoken while the remaining actions run.
+        """
         if not command:
             return True
             
         # Check for exit commands
-        if any(keyword in command for keyword in ['stop', 'exit', 'quit', 'goodbye', 'bye']):
-            self.speak("Thank you for using the I Knowledge Factory voice assistant. Goodbye!")
+        if self.is_exit_command(command):
+            self.speak(f"Thank you for using the {self.website_context['company_name']} voice assistant. Goodbye!")
             return False
         
-        # Extract detailed page content
-        detailed_content = self.extract_detailed_page_content()
+        timeline = timeline or TurnTimeline(self.tracer)
         
-        # Get AI response with enhanced context
-        ai_response = self.get_ai_response(command, detailed_content)
+        # Extract detailed page content (usually started when the talk button came up)
+        if page_future:
+            detailed_content = page_future.result()
+        else:
+            detailed_content = timeline.run('extract', self.extract_detailed_page_content)
+        
+        # Clear navigation/apply commands start right away, in parallel with the LLM call
+        fast_actions = self.site_map.intent_router.fast_path(command)
+        fast_future = None
+        if fast_actions:
+            print(f"⚡ Fast path actions: {fast_actions}")
+            fast_future = self.executor.submit(
+                timeline.run, 'fast_actions', self.perform_actions, fast_actions, timeline)
+        
+        try:
+            # Get AI response with enhanced context; when streaming, each sentence
+            # is spoken as soon as it arrives instead of after the whole turn
+            def speak_sentence(sentence):
+                timeline.mark('speak')
+                self.speak(sentence)
+            on_sentence = speak_sentence if self.stream_responses else None
+            with timeline.stage('llm'):
+                ai_response = self.get_ai_response(command, detailed_content, on_sentence=on_sentence)
+            if not on_sentence:
+                timeline.mark('speak')
+                self.speak(ai_response)
         
-        # Extract and perform actions
-        actions = self.extract_actions_from_response(ai_response, command)
+            # Extract and perform whatever the fast path has not already done; speech
+            # output is queued, so the answer keeps playing while these run
+            actions = self.extract_actions_from_response(ai_response, command)
+            follow_up = fast_future.result() if fast_future else ""
+            follow_up += self.perform_actions([a for a in actions if a not in fast_actions], timeline)
         
-        # Perform actions
+            # Speak the action follow-up
+            if follow_up:
+                timeline.mark('speak')
+                self.speak(follow_up.strip())
+        finally:
+            # Even when cancelled, let the fast-path stage reach its next checkpoint so
+            # none of this turn's browser work runs once the next turn has started
+            if fast_future:
+                fast_future.exception()
+        
+        self.last_timeline = timeline
+        print(f"⏱️ Turn timeline: {timeline.summary()}")
+        self.tracer.flush_turn(command=command, total=round(timeline.total(), 4))
+        return True
+
+    def perform_actions(self, actions, timeline=None):
+        """Run browser actions in order; return any follow-up text to speak"""
+        timeline = timeline or TurnTimeline(self.tracer)
+        follow_up = ""
         for action_type, action_value in actions:
+            self.scheduler.check()  # Abandon the rest once the turn is cancelled
             if action_type == "navigate":
-                success = self.navigate_to_page(action_value)
+                success = timeline.run(f"navigate:{action_value}", self.navigate_to_page, action_value)
                 if success:
-                    time.sleep(1)  # Allow page to load
-                    detailed_content = self.extract_detailed_page_content()
+                    self.extract_detailed_page_content()
             elif action_type == "apply_for_job":
-                success = self.apply_for_job(action_value)
+                success = timeline.run(f"apply:{action_value}", self.apply_for_job, action_value)
                 if success:
-                    ai_response += f" I've found the {action_value} position and opened the application process for you."
+                    follow_up += f" I've found the {action_value} position and opened the application process for you."
+                    summary = timeline.run(f"fill_form:{action_value}", self.fill_application_form,
+                                           self.current_context.get('applied_job', ''))
+                    if summary:
+                        follow_up += " " + summary
             elif action_type == "show_jobs":
                 # Already handled by navigation to career page
                 pass
-        
-        # Speak the AI response
-        self.speak(ai_response)
-        return True
+        return follow_up
 
     def run(self):
         """Main execution loop"""
@@ -649,52 +3831,641 @@ Current page content: {detailed_content.get('main_content', '')[:800]}"""
         print("   🤖 ENHANCED AI VOICE WEB AGENT   ")
         print("="*60)
         
-        # Test API connection
-        if not self.test_groq_connection():
-            print("❌ Cannot proceed without working API connection.")
-            return
+        self.tracer.start()
+        
+        try:
+            # Startup steps run in the background; the window is up straight away
+            startup_complete = self.start_up()
+            if isinstance(self.gui, HeadlessStatus):
+                startup_complete.wait()
+            
+            # Start GUI - this will block until GUI is closed
+            self.gui.run()
+            
+        except Exception as e:
+            print(f"❌ Error in main loop: {e}")
+        finally:
+            self.shutdown()
+
+    def open_website(self, ceiling=15.0):
+        """Load the start page and take the initial page snapshot"""
+        print(f"🌐 Opening website: {self.website_url}")
+        with self.driver_lock:
+            self.driver.get(self.website_url)
+            self.readiness.wait(ceiling=ceiling)
+        self.browser_ready.set()
+        return self.extract_detailed_page_content()
+
+    def start_browser(self):
+        """Launch Chrome and open the start page; browser actions wait for this"""
+        try:
+            if self.setup_webdriver():
+                self.open_website()
+                return True
+        except Exception as e:
+            print(f"❌ Error opening website: {e}")
+        self.gui.update_status("Browser failed to start")
+        self.browser_ready.set()  # Let waiting browser actions fail fast
+        return False
+
+    def start_up(self):
+        """Run the independent startup steps concurrently, in the background
+        
+        The API check, microphone calibration and the browser launch plus first page
+        load overlap. The agent reports ready and speaks its (templated) welcome once
+        the API check and calibration pass, while the browser may still be loading;
+        browser actions wait for it. startup_complete is set when everything is done.
+        """
+        timeline = TurnTimeline(self.tracer)
+        self.startup_timeline = timeline
+        self.gui.update_status("Starting up...")
+        api_check = self.executor.submit(timeline.run, 'api_check', self.test_groq_connection)
+        browser = self.executor.submit(timeline.run, 'browser', self.start_browser)
+        calibration = (self.executor.submit(timeline.run, 'calibrate', self.calibrate_microphone)
+                       if self.microphone else None)
+        self.crawler.start()
+        
+        def finish():
+            try:
+                if not api_check.result():
+                    print("❌ Cannot proceed without working API connection.")
+                    self.gui.update_status("Groq API connection failed")
+                    return
+                self.llm.start_keepalive()
+                if calibration:
+                    calibration.result()
+                timeline.mark('ready')
+                self.gui.update_status("Ready to listen")
+                self.speak(WELCOME_TEMPLATE.format(company_name=self.website_context['company_name']))
+                
+                print("\n" + "="*60)
+                print("🎤 PUSH-TO-TALK VOICE CONTROL READY!")
+                print("- Hold the button or SPACE key to talk")
+                print("- Ask about jobs, services, navigate pages")
+                print("- Say 'apply for [job]' to start application process")
+                print("="*60 + "\n")
+                
+                browser.result()
+                print(f"⏱️ Startup timeline: {timeline.summary()}")
+            finally:
+                self.startup_complete.set()
+        
+        threading.Thread(target=finish, daemon=True, name='startup').start()
+        return self.startup_complete
+
+    @classmethod
+    def for_session(cls, template, driver, tts_backend):
+        """Agent for one server visitor, built without running __init__
         
-        # Setup webdriver
-        if not self.setup_webdriver():
+        The conversation, page model, scheduler and speech output are the session's
+        own. The LLM client, response cache, crawler, navigation map, STT model and
+        executors are the template's, so a session costs no file loads,
+        connections or worker threads beyond its speech output.
+        """
+        agent = cls.__new__(cls)
+        for name in ('website_url', 'headless', 'executor', 'llm_executor', 'recognizer', 'groq_api_key',
+                     'groq_url', 'llm', 'stream_responses', 'model_router', 'race_models', 'response_cache',
+                     'website_context', 'navigation_path', 'site_map', 'crawler', 'max_recording_seconds'):
+            setattr(agent, name, getattr(template, name))
+        agent.tracer = template.tracer.session_view()  # Shared metrics, this visitor's turn spans
+        agent.stt = copy.copy(template.stt)  # Own decoder state, same (possibly large) model
+        agent.browser_profile_dir = None
+        agent.temp_profile_dir = None
+        agent.driver = driver
+        agent.driver_lock = threading.RLock()
+        agent.browser_ready = threading.Event()
+        agent.startup_timeline = None
+        agent.startup_complete = threading.Event()
+        agent.scheduler = TurnScheduler(agent.tracer)
+        agent.last_timeline = None
+        agent.readiness = PageReadiness(driver, interrupted=agent.scheduler.cancelled)
+        agent.listening = False
+        agent.current_page_content = None
+        agent.page_model_version = None
+        agent.job_index = None
+        agent.conversation_history = []
+        agent.current_context = {}
+        agent.applicant_profile_path = None  # Visitors never get the operator's details filled in
+        agent.is_recording = False
+        agent.microphone = None
+        agent.capture = None
+        agent.hands_free = False
+        agent.speech = SpeechOutput(tts_backend, tracer=agent.tracer)
+        agent.llm_usage = deque(maxlen=LLM_USAGE_HISTORY)
+        agent.retriever = ContextRetriever()
+        agent.prompt_builder = PromptBuilder(agent.website_context, agent.retriever)
+        agent.conversation_summary = ""
+        agent.gui = HeadlessStatus()
+        return agent
+
+    def shutdown(self):
+        """Close the browser and print session statistics"""
+        if self.capture:
+            self.capture.stop()
+        if self.driver:
+            self.driver.quit()
+            self.driver = None
+        if self.temp_profile_dir:
+            shutil.rmtree(self.temp_profile_dir, ignore_errors=True)
+            self.temp_profile_dir = None
+        self.response_cache.flush()
+        print(f"📊 Response cache: {self.response_cache.stats()}")
+        print(f"📊 Speech output: {self.speech.metrics()}")
+        print(f"📊 Prompt tokens per turn: {self.prompt_builder.report()}")
+        print(f"📊 Model usage: {self.model_usage_report()}")
+        self.tracer.stop()
+        print("✅ Enhanced AI Voice Web Agent terminated.")
+
+# Upper bound on a request body or WebSocket message (a minute of 16 kHz WAV is ~2 MB)
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+def websocket_accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+
+def read_websocket_message(stream):
+    """Read one client message as (opcode, payload); (None, b'') when the connection is gone"""
+    opcode, parts, size = None, [], 0
+    while True:
+        header = stream.read(2)
+        if len(header) < 2:
+            return None, b''
+        fin, frame_opcode, length = header[0] & 0x80, header[0] & 0x0F, header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', stream.read(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', stream.read(8))[0]
+        size += length
+        if size > MAX_MESSAGE_BYTES:
+            return None, b''
+        mask = stream.read(4) if header[1] & 0x80 else None
+        payload = stream.read(length)
+        if mask and length:
+            key = (mask * (length // 4 + 1))[:length]
+            payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+        if frame_opcode >= 0x8:
+            return frame_opcode, payload  # Control frames may arrive between fragments
+        if frame_opcode:
+            opcode = frame_opcode
+        parts.append(payload)
+        if fin:
+            return opcode, b''.join(parts)
+
+def write_websocket_message(stream, payload, opcode=0x1):
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    stream.write(header + payload)
+    stream.flush()
+
+def audio_from_wav(data):
+    """Decode an uploaded WAV/AIFF/FLAC file into AudioData for the STT backends"""
+    with sr.AudioFile(io.BytesIO(data)) as source:
+        return sr.Recognizer().record(source)
+
+class BrowserPool:
+    """Bounded pool of headless Chrome instances shared by server sessions
+    
+    Browsers are launched on demand up to size and reused after a reset;
+    acquire() returns None when all of them are checked out so the server can
+    turn a visitor away instead of queueing them behind other sessions. Each
+    slot keeps its own warm profile directory under profile_root (Chrome locks
+    a profile to one running instance).
+    """
+    
+    def __init__(self, size, tracer=None, factory=None, profile_root=None):
+        self.size = size
+        self.tracer = tracer or Tracer()
+        self.factory = factory or (lambda profile_dir: build_chrome_driver(headless=True, profile_dir=profile_dir))
+        self.profile_root = profile_root
+        self.lock = threading.Lock()
+        self.idle = []
+        self.free_slots = list(range(size - 1, -1, -1))
+        self.slots = {}  # id(driver) -> profile slot
+    
+    def acquire(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+            if not self.free_slots:
+                return None
+            slot = self.free_slots.pop()
+        profile_dir = os.path.join(self.profile_root, f"slot-{slot}") if self.profile_root else None
+        try:
+            driver = self.factory(profile_dir)
+        except Exception:
+            with self.lock:
+                self.free_slots.append(slot)
+            raise
+        with self.lock:
+            self.slots[id(driver)] = slot
+        self.tracer.instrument_driver(driver)
+        return driver
+    
+    def release(self, driver):
+        """Clear a browser's state and return it to the pool; a broken one is discarded"""
+        try:
+            driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            driver.delete_all_cookies()
+            driver.get('about:blank')
+        except Exception as e:
+            print(f"⚠️ Discarding browser after failed reset: {e}")
+            self.discard(driver)
             return
+        with self.lock:
+            self.idle.append(driver)
+    
+    def discard(self, driver):
+        with self.lock:
+            self.free_slots.append(self.slots.pop(id(driver)))
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def warm(self, count):
+        """Launch browsers ahead of the first visitors"""
+        drivers = [driver for driver in (self.acquire() for _ in range(min(count, self.size))) if driver]
+        for driver in drivers:
+            self.release(driver)
+    
+    def stats(self):
+        with self.lock:
+            return {'size': self.size, 'launched': len(self.slots), 'idle': len(self.idle),
+                    'in_use': len(self.slots) - len(self.idle)}
+    
+    def close(self):
+        with self.lock:
+            drivers, self.idle = self.idle, []
+        for driver in drivers:
+            self.discard(driver)
+
+class SessionSpeechBackend(TTSBackend):
+    """Hands each spoken chunk to a server session instead of a speaker"""
+    
+    name = 'session'
+    
+    def __init__(self, on_chunk):
+        super().__init__()
+        self.on_chunk = on_chunk
+    
+    def synthesize(self, text):
+        return text
+    
+    def play(self, audio):
+        self.on_chunk(audio)
+    
+    def cleanup(self, audio):
+        pass
+
+class AgentSession:
+    """One visitor: an agent with its own conversation state and a pooled browser"""
+    
+    def __init__(self, server, driver):
+        self.id = uuid.uuid4().hex
+        self.driver = driver
+        self.turn_lock = threading.Lock()  # One turn at a time per visitor
+        self.closed = False
+        self.last_active = time.monotonic()
+        self.replies = []
+        self.listener = None  # Streams reply chunks to a WebSocket while a turn runs
+        self.agent = AIVoiceWebAgent.for_session(server.template, driver, SessionSpeechBackend(self.deliver))
+    
+    def deliver(self, text):
+        self.replies.append(text)
+        if self.listener:
+            self.listener(text)
+    
+    def turn(self, text=None, audio=None, listener=None):
+        """Run one text or audio turn and return its replies once they have all been delivered
         
+        Raises ValueError for a turn that is neither audio nor a string of text, or
+        once the session is closed; a failure inside the turn is apologized for and
+        reported under 'error'.
+        """
+        if audio is None and not isinstance(text, str):
+            raise ValueError("expected audio or a string 'text'")
+        with self.turn_lock:
+            if self.closed:
+                raise ValueError("session is closed")
+            started = time.monotonic()
+            self.replies, self.listener = [], listener
+            self.agent.last_timeline = None
+            transcript = ''
+            error = None
+            try:
+                if audio is not None:
+                    transcript = self.agent.process_utterance(audio, started)
+                else:
+                    transcript = text.strip().lower()
+                    self.agent.process_command(transcript)
+            except Exception as e:
+                print(f"⚠️ Session {self.id[:8]} turn failed: {e}")
+                error = str(e) or type(e).__name__
+                self.agent.speech.say("Sorry, something went wrong with that request. Please try again.")
+            try:
+                self.agent.speech.wait_until_idle(timeout=60)
+            finally:
+                self.listener = None
+                self.last_active = time.monotonic()
+            try:
+                with self.agent.driver_lock:
+                    url = self.driver.current_url
+            except Exception as e:
+                print(f"⚠️ Could not read the session's page URL: {e}")
+                url = None
+            timeline = self.agent.last_timeline
+            result = {'session_id': self.id, 'transcript': transcript, 'replies': list(self.replies),
+                      'url': url, 'ended': bool(transcript) and self.agent.is_exit_command(transcript),
+                      'seconds': round(time.monotonic() - started, 3),
+                      'timeline': timeline.summary() if timeline else None}
+            if error:
+                result['error'] = error
+            return result
+    
+    def close(self):
+        """Cut off the reply being spoken and wait for the running turn, if any, to finish
+        
+        The turn still drives the session's browser until then, so the browser must
+        not go back to the pool before this returns. Later turns are refused.
+        """
+        self.agent.speech.interrupt()
+        with self.turn_lock:
+            self.closed = True
+            self.agent.speech.close()
+
+class AgentServer:
+    """Serve many visitors from one process over HTTP and WebSocket
+    
+    Each session gets a lightweight agent (its own conversation history, summary
+    and page model) and a browser from a BrowserPool sized to the CPU count by
+    default; the LLM connection pool, response cache, crawler, STT model, stage
+    executor and metrics are shared. This is a single process: every session is
+    a thread under one GIL, so the agent's own Python work (extraction parsing,
+    retrieval, STT decoding) runs on one core at a time however many there are.
+    Scale past that by running more servers behind a load balancer with sticky
+    sessions. When every browser is in use new sessions get 503 with Retry-After.
+    
+        POST   /sessions              -> {"session_id": ...}
+        POST   /sessions/<id>/turn    JSON {"text": ...} or a WAV body (Content-Type audio/wav)
+        GET    /sessions/<id>/ws      WebSocket: text/JSON or binary WAV in, reply chunks out
+        DELETE /sessions/<id>
+        GET    /health, /metrics
+    """
+    
+    def __init__(self, host='127.0.0.1', port=8765, pool_size=None, api_key=None,
+                 website_url="https://www.ikf.co.in/", groq_url=None, session_ttl=600, cache_dir=CACHE_DIR):
+        self.host = host
+        self.port = port
+        self.website_url = website_url
+        self.cache_dir = cache_dir
+        self.session_ttl = session_ttl
+        api_key = api_key or os.getenv('GROQ_API_KEY')
+        if not api_key:
+            raise ValueError("Set GROQ_API_KEY to run the agent server")
+        pool_size = pool_size or os.cpu_count() or 2
+        # Owns the resources every session shares; never gets a browser of its own
+        self.template = AIVoiceWebAgent(api_key=api_key, website_url=website_url, groq_url=groq_url,
+                                        use_gui=False, use_microphone=False, headless=True,
+                                        tts_backend=WavFileBackend(), cache_dir=cache_dir,
+                                        stage_workers=4 * pool_size)
+        self.pool = BrowserPool(pool_size, tracer=self.template.tracer,
+                                profile_root=os.path.join(cache_dir, 'chrome-profiles'))
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.rejected = 0
+        self.httpd = None
+    
+    def create_session(self):
+        """New session with a browser on the start page, or None when the pool is exhausted"""
+        driver = self.pool.acquire()
+        if driver is None:
+            with self.lock:
+                self.rejected += 1
+            return None
         try:
-            # Open website
-            print(f"🌐 Opening website: {self.website_url}")
-            self.driver.get(self.website_url)
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            session = AgentSession(self, driver)
+            session.agent.open_website()
+        except Exception:
+            self.pool.release(driver)
+            raise
+        with self.lock:
+            self.sessions[session.id] = session
+        print(f"👤 Session {session.id[:8]} started ({self.pool.stats()['in_use']}/{self.pool.size} browsers in use)")
+        return session
+    
+    def get_session(self, session_id):
+        with self.lock:
+            return self.sessions.get(session_id)
+    
+    def close_session(self, session_id):
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session:
+            session.close()  # Waits out a running turn before its browser is reset and reused
+            self.pool.release(session.driver)
+            print(f"👋 Session {session_id[:8]} closed")
+        return session is not None
+    
+    def reap_idle_sessions(self):
+        while True:
+            time.sleep(min(self.session_ttl, 30))
+            now = time.monotonic()
+            with self.lock:
+                idle = [sid for sid, s in self.sessions.items()
+                        if now - s.last_active > self.session_ttl and not s.turn_lock.locked()]
+            for session_id in idle:
+                self.close_session(session_id)
+    
+    def health(self):
+        with self.lock:
+            sessions = len(self.sessions)
+        return {'sessions': sessions, 'rejected': self.rejected, 'pool': self.pool.stats(),
+                'cpus': os.cpu_count()}
+    
+    def start(self):
+        """Check the LLM, start shared background work and serve in a background thread"""
+        template = self.template
+        template.tracer.start()
+        if not template.test_groq_connection():
+            raise RuntimeError("Groq API connection failed")
+        template.llm.start_keepalive()
+        template.crawler.start()
+        self.pool.warm(1)
+        
+        server = self
+        
+        class SessionHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = self.path.strip('/').split('/')
+                if parts == ['health']:
+                    self.send_json(200, server.health())
+                elif parts == ['metrics']:
+                    self.send_body(200, template.tracer.prometheus_text().encode('utf-8'),
+                                   'text/plain; version=0.0.4')
+                elif len(parts) == 3 and parts[0] == 'sessions' and parts[2] == 'ws':
+                    self.serve_websocket(parts[1])
+                else:
+                    self.send_json(404, {'error': 'not found'})
+            
+            def do_POST(self):
+                parts = self.path.strip('/').split('/')
+                if parts == ['sessions']:
+                    try:
+                        session = server.create_session()
+                    except Exception as e:
+                        self.send_json(500, {'error': f"could not start a browser session: {e}"})
+                        return
+                    if session is None:
+                        self.send_json(503, {'error': 'all browser sessions are busy'}, {'Retry-After': '5'})
+                    else:
+                        self.send_json(201, {'session_id': session.id})
+                elif len(parts) == 3 and parts[0] == 'sessions' and parts[2] == 'turn':
+                    session = server.get_session(parts[1])
+                    length = int(self.headers.get('Content-Length', 0))
+                    if session is None:
+                        self.send_json(404, {'error': 'unknown session'})
+                    elif length > MAX_MESSAGE_BYTES:
+                        self.send_json(413, {'error': 'request too large'})
+                    else:
+                        body = self.rfile.read(length)
+                        try:
+                            if self.headers.get('Content-Type', '').startswith('audio/'):
+                                result = session.turn(audio=audio_from_wav(body))
+                            else:
+                                result = session.turn(text=json.loads(body)['text'])
+                        except (ValueError, KeyError, TypeError) as e:
+                            self.send_json(400, {'error': f"bad turn request: {e}"})
+                            return
+                        self.send_json(500 if 'error' in result else 200, result)
+                        if result['ended']:
+                            server.close_session(session.id)
+                else:
+                    self.send_json(404, {'error': 'not found'})
             
-            # Initial page analysis
-            self.extract_detailed_page_content()
+            def do_DELETE(self):
+                parts = self.path.strip('/').split('/')
+                if len(parts) == 2 and parts[0] == 'sessions' and server.close_session(parts[1]):
+                    self.send_json(200, {'closed': parts[1]})
+                else:
+                    self.send_json(404, {'error': 'unknown session'})
             
-            # Welcome message
-            welcome_response = self.get_ai_response("Introduce yourself as the enhanced voice assistant for I Knowledge Factory website. Mention the push-to-talk feature and what you can help with.")
-            self.speak(welcome_response)
+            def serve_websocket(self, session_id):
+                session = server.get_session(session_id)
+                key = self.headers.get('Sec-WebSocket-Key')
+                if session is None or not key or self.headers.get('Upgrade', '').lower() != 'websocket':
+                    self.send_json(400, {'error': 'expected a WebSocket upgrade for a known session'})
+                    return
+                self.send_response(101)
+                self.send_header('Upgrade', 'websocket')
+                self.send_header('Connection', 'Upgrade')
+                self.send_header('Sec-WebSocket-Accept', websocket_accept_key(key))
+                self.end_headers()
+                self.close_connection = True
+                
+                send_lock = threading.Lock()
+                def send(message, opcode=0x1):
+                    with send_lock:
+                        write_websocket_message(self.wfile, message, opcode)
+                
+                while True:
+                    opcode, payload = read_websocket_message(self.rfile)
+                    if opcode is None or opcode == 0x8:
+                        try:
+                            send(b'', 0x8)
+                        except OSError:
+                            pass
+                        return
+                    if opcode == 0x9:
+                        send(payload, 0xA)
+                        continue
+                    try:
+                        if opcode == 0x2:
+                            turn = {'audio': audio_from_wav(payload)}
+                        else:
+                            text = payload.decode('utf-8')
+                            turn = {'text': json.loads(text)['text'] if text.lstrip().startswith('{') else text}
+                        result = session.turn(listener=lambda chunk: send(json.dumps({'type': 'reply', 'text': chunk})),
+                                              **turn)
+                    except (ValueError, KeyError, TypeError) as e:
+                        send(json.dumps({'type': 'error', 'error': f"bad turn message: {e}"}))
+                        continue
+                    send(json.dumps(dict(result, type='done')))
+                    if result['ended']:
+                        server.close_session(session.id)
+                        send(b'', 0x8)
+                        return
             
-            print("\n" + "="*60)
-            print("🎤 PUSH-TO-TALK VOICE CONTROL READY!")
-            print("- Hold the button or SPACE key to talk")
-            print("- Ask about jobs, services, navigate pages")
-            print("- Say 'apply for [job]' to start application process")
-            print("="*60 + "\n")
+            def handle(self):
+                try:
+                    super().handle()
+                except (ConnectionResetError, BrokenPipeError):
+                    pass  # Visitor went away mid-request
             
-            # Start GUI - this will block until GUI is closed
-            self.gui.run()
+            def send_json(self, status, data, headers=None):
+                self.send_body(status, json.dumps(data).encode('utf-8'), 'application/json', headers)
             
-        except Exception as e:
-            print(f"❌ Error in main loop: {e}")
+            def send_body(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer((self.host, self.port), SessionHandler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True, name='agent-server').start()
+        threading.Thread(target=self.reap_idle_sessions, daemon=True, name='session-reaper').start()
+        print(f"🚀 Agent server listening on http://{self.host}:{self.port} "
+              f"({self.pool.size} browser sessions, {os.cpu_count()} CPUs)")
+        return f"http://{self.host}:{self.port}"
+    
+    def serve_forever(self):
+        self.start()
+        try:
+            while True:
+                time.sleep(3600)
         finally:
-            if self.driver:
-                self.driver.quit()
-            print("✅ Enhanced AI Voice Web Agent terminated.")
+            self.stop()
+    
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd = None
+        with self.lock:
+            session_ids = list(self.sessions)
+        for session_id in session_ids:
+            self.close_session(session_id)
+        self.pool.close()
+        self.template.shutdown()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enhanced AI Voice Web Agent")
+    parser.add_argument('--server', action='store_true',
+                        help="serve many headless sessions over HTTP/WebSocket instead of the desktop GUI")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pool-size', type=int, help="headless browsers to run (default: CPU count)")
+    args = parser.parse_args()
     
     try:
-        agent = AIVoiceWebAgent()
-        agent.run()
+        if args.server:
+            AgentServer(host=args.host, port=args.port, pool_size=args.pool_size).serve_forever()
+        else:
+            agent = AIVoiceWebAgent()
+            agent.run()
     except KeyboardInterrupt:
         print("\n🛑 Exiting...")
     except Exception as e:
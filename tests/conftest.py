@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import AIVoiceWebAgent, WavFileBackend  # noqa: E402
+
+
+@pytest.fixture
+def make_agent(tmp_path):
+    """Headless agent with no GUI, microphone or browser, talking to the given LLM URL"""
+    agents = []
+
+    def make(groq_url='http://127.0.0.1:9/openai/v1/chat/completions'):
+        agent = AIVoiceWebAgent(api_key='gsk_test_key', website_url='http://127.0.0.1:9/', groq_url=groq_url,
+                                use_gui=False, use_microphone=False, headless=True,
+                                tts_backend=WavFileBackend(), cache_dir=str(tmp_path))
+        agent.response_cache.max_entries = 0
+        agents.append(agent)
+        return agent
+    yield make
+    for agent in agents:
+        agent.shutdown()
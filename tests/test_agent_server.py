@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from main import LLM_USAGE_HISTORY, AgentServer, AgentSession, AIVoiceWebAgent, BrowserPool, WavFileBackend
+
+
+class FakeDriver:
+    """Just enough WebDriver for a session turn and a pool reset"""
+
+    def __init__(self, events):
+        self.events = events
+        self.current_url = 'http://127.0.0.1:9/'
+
+    def execute_script(self, script, *args):
+        self.events.append('reset')
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        self.current_url = url
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = AgentServer(port=0, pool_size=1, api_key='gsk_test_key', website_url='http://127.0.0.1:9/',
+                         groq_url='http://127.0.0.1:9/openai/v1/chat/completions', cache_dir=str(tmp_path))
+    server.events = []
+    server.pool = BrowserPool(1, factory=lambda profile_dir: FakeDriver(server.events))
+    yield server
+    server.template.shutdown()
+
+
+def open_session(server):
+    session = AgentSession(server, server.pool.acquire())
+    server.sessions[session.id] = session
+    return session
+
+
+def test_closing_a_session_waits_for_its_running_turn(server):
+    session = open_session(server)
+    started = threading.Event()
+
+    def slow_command(command):
+        server.events.append('turn started')
+        started.set()
+        time.sleep(0.3)
+        server.events.append('turn finished')
+    session.agent.process_command = slow_command
+
+    turn = threading.Thread(target=session.turn, kwargs={'text': 'tell me about your services'})
+    turn.start()
+    started.wait(5)
+    assert server.close_session(session.id)
+    turn.join(5)
+    assert server.events == ['turn started', 'turn finished', 'reset']
+    assert server.pool.stats()['idle'] == 1
+
+
+def test_a_closed_session_refuses_further_turns(server):
+    session = open_session(server)
+    server.close_session(session.id)
+    with pytest.raises(ValueError):
+        session.turn(text='hello again')
+    assert not server.close_session(session.id)
+
+
+def test_sessions_trace_their_own_turns(make_agent):
+    template = make_agent()
+    template.tracer.enabled, template.tracer.trace_path = True, None
+    first, second = (AIVoiceWebAgent.for_session(template, None, WavFileBackend()) for _ in range(2))
+    first.tracer.record('llm', 0.2)
+    second.tracer.record('navigate', 0.3)
+    assert [span['name'] for span in first.tracer.turn_spans] == ['llm']
+    assert [span['name'] for span in second.tracer.turn_spans] == ['navigate']
+    assert sorted(template.tracer.histograms) == ['llm', 'navigate']
+
+
+def test_llm_usage_is_bounded(make_agent):
+    session = AIVoiceWebAgent.for_session(make_agent(), None, WavFileBackend())
+    for _ in range(LLM_USAGE_HISTORY + 5):
+        session.record_usage('llama-3.1-8b-instant', 'question', 100, 20, 0.1)
+    assert len(session.llm_usage) == LLM_USAGE_HISTORY
@@ -0,0 +1,97 @@
+import pytest
+
+from main import Form, FormField, FormMapper, Locator
+
+APPLICANT = {
+    "name": "Asha Verma", "email": "asha.verma@example.test", "phone": "+91 98765 43210",
+    "city": "Pune", "current_company": "Acme Digital", "current_ctc": "6", "expected_ctc": "9",
+    "notice_period": "30 days", "experience": "3", "qualification": "B.Tech", "college": "COEP",
+    "linkedin": "https://www.linkedin.com/in/asha-verma", "portfolio": "https://github.com/ashaverma",
+    "skills": "Python, LLMs, prompt engineering", "gender": "Female", "consent": True,
+    "cover_letter": "I enjoy building AI products and would love to learn from your team.",
+}
+
+# (type, name, label, placeholder) -> profile key it should get; the benchmark's application form
+APPLICATION_FORM = [
+    (('text', 'first_name', 'First name', None), 'first_name'),
+    (('text', 'last_name', 'Last name', None), 'last_name'),
+    (('email', 'email', 'Email address', None), 'email'),
+    (('tel', 'mobile', 'Mobile number', None), 'phone'),
+    (('text', 'city', 'Current city', None), 'city'),
+    (('text', 'companyName', 'Company name', None), 'current_company'),
+    (('text', 'currentCTC', 'Current CTC (LPA)', None), 'current_ctc'),
+    (('text', 'expectedCTC', 'Expected CTC (LPA)', None), 'expected_ctc'),
+    (('number', 'exp_years', 'Total experience (years)', None), 'experience'),
+    (('text', 'qualification', 'Highest qualification', None), 'qualification'),
+    (('url', 'linkedin', 'LinkedIn profile', None), 'linkedin'),
+    (('url', 'portfolio_url', 'Portfolio / GitHub', None), 'portfolio'),
+    (('text', 'college', '', 'University / College'), 'college'),
+    (('text', 'notice', '', 'Notice period'), 'notice_period'),
+    (('text', 'skills', 'Key skills', None), 'skills'),
+    (('select', 'position', 'Position applied for', None), 'position'),
+    (('radio', 'gender', 'Male', None), 'gender'),
+    (('radio', 'gender', 'Female', None), 'gender'),
+    (('textarea', 'cover', 'Why do you want to join us?', None), 'cover_letter'),
+    (('checkbox', 'consent', 'I agree to the privacy policy', None), 'consent'),
+]
+
+
+def field(kind, name, label='', placeholder=None, autocomplete=None):
+    return FormField(kind, name, placeholder, Locator(f'[name="{name}"]', f'{name}:{label}'), label, name,
+                     autocomplete)
+
+
+def form(*fields):
+    return Form(tuple(fields), None)
+
+
+def assigned(plan):
+    return [(match.field.label or match.field.placeholder, match.key) for match in plan]
+
+
+@pytest.fixture(scope='module')
+def mapper():
+    return FormMapper(APPLICANT)
+
+
+def test_application_form(mapper):
+    application = form(*(field(*spec) for spec, _ in APPLICATION_FORM))
+    plan = mapper.plan(application, {'position': 'AI LLM Intern'})
+    assert assigned(plan) == [(spec[2] or spec[3], key) for spec, key in APPLICATION_FORM]
+
+
+def test_full_name_is_split_for_first_and_last_name_fields(mapper):
+    plan = mapper.plan(form(field('text', 'fname', 'First name'), field('text', 'lname', 'Surname')))
+    assert [match.value for match in plan] == ['Asha', 'Verma']
+
+
+def test_each_key_fills_one_field(mapper):
+    plan = mapper.plan(form(field('email', 'email', 'Email'), field('email', 'confirm', 'Confirm email')))
+    assert assigned(plan) == [('Email', 'email')]
+
+
+def test_autocomplete_is_decisive(mapper):
+    plan = mapper.plan(form(field('text', 'x1', 'Org', autocomplete='organization')))
+    assert assigned(plan) == [('Org', 'current_company')]
+
+
+@pytest.mark.parametrize('label', ["Company website", "Email or phone"])
+def test_fields_two_keys_only_partly_name_are_left_empty(mapper, label):
+    assert mapper.plan(form(field('text', 'f1', label))) == []
+
+
+def test_a_partial_match_inside_a_longer_alias_is_not_a_rival(mapper):
+    assert assigned(mapper.plan(form(field('text', 'f1', 'Current company name')))) == [
+        ('Current company name', 'current_company')]
+
+
+def test_fields_about_someone_else_and_uploads_are_skipped(mapper):
+    plan = mapper.plan(form(field('text', 'father_name', "Father's name"), field('file', 'resume', 'Resume'),
+                            field('hidden', 'csrf')))
+    assert plan == []
+
+
+def test_best_plan_picks_the_form_the_profile_fills_most(mapper):
+    search = form(field('text', 'q', 'Search'))
+    contact = form(field('text', 'name', 'Your name'), field('email', 'email', 'Email'))
+    assert assigned(mapper.best_plan([search, contact])) == [('Your name', 'full_name'), ('Email', 'email')]
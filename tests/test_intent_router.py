@@ -0,0 +1,59 @@
+import pytest
+
+from main import DEFAULT_JOB_KEYWORDS, IntentRouter
+
+PAGES = ['home', 'about us', 'services', 'career', 'contact', 'portfolio', 'blog', 'team']
+
+
+@pytest.fixture(scope='module')
+def router():
+    return IntentRouter(PAGES, DEFAULT_JOB_KEYWORDS)
+
+
+# Utterance -> actions safe to start before the LLM answers
+FAST_PATH_CORPUS = [
+    ("go to the contact page", [('navigate', 'contact')]),
+    ("take me to the career page", [('navigate', 'career')]),
+    ("open services", [('navigate', 'services')]),
+    ("navigate to the about us page", [('navigate', 'about us')]),
+    ("please visit the blog", [('navigate', 'blog')]),
+    ("portfolio page please", [('navigate', 'portfolio')]),
+    ("Go to the Team page.", [('navigate', 'team')]),
+    ("i want to apply for the developer job", [('apply_for_job', 'developer')]),
+    ("can i apply for the designer position", [('apply_for_job', 'designer')]),
+    ("what services do you offer", []),
+    ("are there any jobs for freshers", []),
+    ("how do i contact you", []),
+    ("tell me about the company", []),
+    ("i want to apply", []),
+    ("what does the team do", []),
+]
+
+
+@pytest.mark.parametrize('utterance, expected', FAST_PATH_CORPUS)
+def test_fast_path_corpus(router, utterance, expected):
+    assert router.fast_path(utterance) == expected
+
+
+def test_topic_words_are_low_confidence_navigation(router):
+    assert router.classify("what services do you offer") == [('navigate', 'services', 0.6)]
+    assert router.classify("are there any jobs for freshers") == [('navigate', 'career', 0.6)]
+
+
+def test_apply_without_a_job_shows_the_openings(router):
+    assert router.classify("i want to apply") == [('show_jobs', '', 0.9)]
+
+
+def test_applying_does_not_also_navigate_to_the_career_page(router):
+    intents = router.classify("i want to apply for the developer job")
+    assert [i.action for i in intents] == ['apply_for_job']
+
+
+def test_navigation_announced_in_the_reply(router):
+    reply = "Sure! I'll navigate to the career page so you can see the openings."
+    assert router.classify_response(reply) == [('navigate', 'career', 0.8)]
+
+
+def test_duplicate_intents_are_dropped(router):
+    intents = router.classify("go to the contact page, the contact page")
+    assert intents == [('navigate', 'contact', 0.95)]
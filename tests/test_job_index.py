@@ -0,0 +1,61 @@
+import pytest
+
+from main import JobIndex, JobPosting
+
+
+def job(title, description=''):
+    return JobPosting(title, description or title, '', '', None)
+
+
+@pytest.fixture(scope='module')
+def index():
+    return JobIndex([
+        job('AI LLM Intern', 'Fine-tune language models and maintain evaluation pipelines.'),
+        job('Python Developer', 'Build backend APIs and email integrations.'),
+        job('UI/UX Designer', 'Design flows for web and mobile apps.'),
+        job('Digital Marketing Executive', 'Run SEO and social media campaigns.'),
+        job('Web Developer Intern', 'Build websites with React.'),
+        job('Senior Python Developer', 'Lead the backend team.'),
+    ])
+
+
+def titles(results):
+    return [posting.title for _, posting in results]
+
+
+def test_exact_title_word(index):
+    assert index.best('the designer job').title == 'UI/UX Designer'
+
+
+def test_short_words_only_match_whole_title_words(index):
+    # 'ai' appears inside 'email' and 'maintain' in the descriptions, never as a title word there
+    assert titles(index.search('ai'))[:1] == ['AI LLM Intern']
+    assert 'Python Developer' not in titles(index.search('ai'))
+
+
+def test_misrecognized_words_match_by_trigrams(index):
+    assert index.best('develper intern').title == 'Web Developer Intern'
+    assert index.best('marketting').title == 'Digital Marketing Executive'
+
+
+def test_more_query_words_matched_ranks_higher(index):
+    assert titles(index.search('web developer'))[0] == 'Web Developer Intern'
+
+
+def test_shorter_title_wins_a_tie(index):
+    assert titles(index.search('python developer'))[:2] == ['Python Developer', 'Senior Python Developer']
+
+
+def test_description_words_only_break_ties(index):
+    scored = dict((posting.title, score) for score, posting in index.search('developer react'))
+    assert scored['Web Developer Intern'] > scored['Python Developer']
+
+
+def test_scores_are_the_share_of_query_words_found(index):
+    score, posting = index.search('python developer')[0]
+    assert (posting.title, score) == ('Python Developer', pytest.approx(1.0))
+
+
+def test_ignored_words_and_no_match(index):
+    assert index.search('apply for the job') == []
+    assert index.best('astronaut') is None
@@ -0,0 +1,89 @@
+import io
+import json
+from concurrent.futures import Future
+
+import pytest
+import requests
+
+from main import FAST_MODEL, LARGE_MODEL, Intent, ModelRouter
+
+
+@pytest.fixture(scope='module')
+def router():
+    return ModelRouter()
+
+
+@pytest.mark.parametrize('utterance, reason', [
+    ("hello", 'small_talk'),
+    ("thanks a lot", 'small_talk'),
+    ("compare your web and mobile services", 'complex'),
+    ("why should i join your team", 'complex'),
+    ("what services do you offer", 'question'),
+    ("is it remote", 'question'),
+    ("do you offer IT consulting", 'question'),
+    ("tell me about the second one", 'question'),
+])
+def test_first_turn_routes(router, utterance, reason):
+    assert router.route(utterance, []).reason == reason
+
+
+@pytest.mark.parametrize('utterance', [
+    "tell me about the second one", "and the other one", "it sounds interesting, what is the pay",
+    "they look good - how do i apply", "what did you say earlier",
+])
+def test_follow_ups_go_to_the_large_model(router, utterance):
+    route = router.route(utterance, [], has_history=True)
+    assert (route.model, route.reason) == (LARGE_MODEL, 'complex')
+
+
+@pytest.mark.parametrize('utterance', ["is it remote", "do you offer IT consulting", "do you work with them"])
+def test_pronouns_inside_a_question_are_not_follow_ups(router, utterance):
+    assert router.route(utterance, [], has_history=True).model == FAST_MODEL
+
+
+def test_long_questions_go_to_the_large_model(router):
+    utterance = "can you tell me what kind of projects your developers usually work on for clients in india"
+    assert router.route(utterance, []).model == LARGE_MODEL
+
+
+def test_confident_commands_get_a_small_capped_answer(router):
+    route = router.route("go to the career page", [Intent('navigate', 'career', 0.95)])
+    assert (route.model, route.reason, route.escalate) == (FAST_MODEL, 'command', False)
+    assert route.max_tokens < router.route("what services do you offer", []).max_tokens
+
+
+def test_plain_questions_may_escalate(router):
+    assert router.route("what services do you offer", []).escalate
+    assert not ModelRouter(LARGE_MODEL, LARGE_MODEL).route("what services do you offer", []).escalate
+
+
+@pytest.mark.parametrize('answer, hedged', [
+    ("We build web and mobile apps.", False),
+    ("I'm not sure what the team works on.", True),
+    ("That is not mentioned on this page.", True),
+    ("", True),
+])
+def test_hedges(router, answer, hedged):
+    assert router.hedges(answer) == hedged
+
+
+def finished(status, body):
+    response = requests.models.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode()
+    response.raw = io.BytesIO()
+    future = Future()
+    future.set_result(response)
+    return future
+
+
+def test_raced_requests_record_what_they_cost(make_agent):
+    agent = make_agent()
+    large = agent.model_router.large
+    body = {'choices': [{'message': {'content': 'We build web and mobile apps.'}}],
+            'usage': {'completion_tokens': 9}}
+    agent.discard_race(large, 500, 0.0, False, finished(200, body))
+    agent.discard_race(large, 500, 0.0, True, finished(200, {}))
+    agent.discard_race(large, 500, 0.0, False, finished(503, {}))
+    assert [u['completion_tokens'] for u in agent.llm_usage] == [9, large.max_tokens, 0]
+    assert agent.model_usage_report()[large.model]['reasons'] == {'raced': 3}
@@ -0,0 +1,79 @@
+import pytest
+
+from main import AIVoiceWebAgent, DEFAULT_JOB_KEYWORDS, IntentRouter, NavigationIndex, WavFileBackend
+
+HOME = 'https://example.test/'
+PAGES = {
+    HOME: HOME,
+    'https://example.test/about-us': 'https://example.test/about-us',
+    'https://example.test/services': 'https://example.test/services',
+    'https://example.test/careers': 'https://example.test/careers',
+    'https://example.test/contact': 'https://example.test/contact',
+    'https://example.test/team': 'https://example.test/team',
+}
+ANCHORS = [('About Us', 'https://example.test/about-us'), ('Services', 'https://example.test/services'),
+           ('Careers', 'https://example.test/careers'), ('Contact', 'https://example.test/contact'),
+           ('Our Team', 'https://example.test/team'), ('Blog', 'https://example.test/blog')]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return NavigationIndex.build(HOME, PAGES, ANCHORS)
+
+
+def test_link_text_slugs_and_synonyms_resolve(index):
+    assert index.resolve('about us') == 'https://example.test/about-us'
+    assert index.resolve('the careers page') == 'https://example.test/careers'
+    assert index.resolve('job openings') == 'https://example.test/careers'
+    assert index.resolve('get in touch') == 'https://example.test/contact'
+
+
+def test_pages_the_crawler_did_not_load_are_not_indexed(index):
+    assert index.resolve('blog') is None
+    assert 'https://example.test/blog' not in index.urls()
+
+
+def test_synonyms_only_index_names_that_still_name_the_page(index):
+    for junk in ('main', 'story', 'work'):
+        assert junk not in index.phrases
+
+
+def test_misheard_names_match_by_similarity(index):
+    assert index.resolve('carreers') == 'https://example.test/careers'
+    assert index.resolve('astronauts') is None
+
+
+@pytest.mark.parametrize('phrase, expected', [
+    ("careers at your company", 'careers'),
+    ("more about team", 'team'),
+    ("about us and services", 'about us'),
+])
+def test_names_inside_a_longer_phrase(index, phrase, expected):
+    assert index.closest(phrase) == expected
+
+
+def test_mentioned_finds_every_name(index):
+    assert [name for name, _ in index.mentioned("Compare the services and the team")] == ['services', 'team']
+
+
+def test_saved_index_loads_back(index, tmp_path):
+    path = str(tmp_path / 'navigation' / 'example.test.json')
+    index.save(path)
+    assert NavigationIndex.load(path).phrases == index.phrases
+    assert NavigationIndex.load(str(tmp_path / 'missing.json')).phrases == {}
+
+
+def test_loose_requests_need_a_page_on_the_site(index):
+    router = IntentRouter(index.spoken_names(), DEFAULT_JOB_KEYWORDS, index)
+    assert router.classify("show me more about the team") == [('navigate', 'team', 0.7)]
+    assert router.classify("go to carreers") == [('navigate', 'careers', 0.7)]
+    assert router.classify("show me something cool") == []
+    assert router.fast_path("show me more about the team") == []
+
+
+def test_sessions_see_a_refreshed_map(make_agent):
+    template = make_agent()
+    session = AIVoiceWebAgent.for_session(template, None, WavFileBackend())
+    template.site_map.update(NavigationIndex.build(HOME, PAGES, ANCHORS))
+    assert session.site_map.navigation.resolve('team') == 'https://example.test/team'
+    assert session.site_map.intent_router.fast_path("go to the team page") == [('navigate', 'team')]
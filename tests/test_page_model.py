@@ -0,0 +1,73 @@
+import pytest
+
+from main import EMPTY_SNAPSHOT
+
+URL = 'https://example.test/career'
+JOB = {'title': 'AI LLM Intern', 'description': 'Fine-tune language models. Location: Pune.',
+       'duration': '', 'location': '', 'locator': ['#job-1', 'AI LLM Intern']}
+FULL = {'url': URL, 'version': 1, 'full': True, 'sections': {
+    'headings': ['Careers', 'Current openings'],
+    'page_type': 'career', 'job_listings': [JOB], 'buttons': [],
+    'forms': [],
+    'title': 'Career', 'url': URL, 'main_content': 'Careers Current openings AI LLM Intern',
+}}
+
+
+class PageModelDriver:
+    """Returns canned PAGE_MODEL_SCRIPT payloads and records the version each call sent"""
+
+    def __init__(self, *payloads):
+        self.payloads = list(payloads)
+        self.known_versions = []
+
+    def execute_script(self, script, *args):
+        self.known_versions.append(args[3])
+        payload = self.payloads.pop(0)
+        if isinstance(payload, Exception):
+            raise payload
+        return payload
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def agent(make_agent):
+    agent = make_agent()
+    agent.browser_ready.set()
+    return agent
+
+
+def sync(agent, *payloads):
+    agent.driver = PageModelDriver(*payloads)
+    return [agent.extract_detailed_page_content() for _ in payloads]
+
+
+def test_unchanged_page_reuses_the_cached_snapshot(agent):
+    first, second = sync(agent, FULL, {'url': URL, 'version': 1, 'full': False, 'sections': {}})
+    assert second is first
+    assert agent.driver.known_versions == [None, 1]
+    assert [job.title for job in first.job_listings] == ['AI LLM Intern']
+
+
+def test_dirty_sections_are_merged_into_the_cached_snapshot(agent):
+    delta = {'url': URL, 'version': 3, 'full': False, 'sections': {'headings': ['Careers', 'We are hiring']}}
+    first, second = sync(agent, FULL, delta)
+    assert second.headings == ('Careers', 'We are hiring')
+    assert second.job_listings is first.job_listings
+    assert second.main_content == first.main_content
+    assert agent.page_model_version == 3
+
+
+def test_a_full_resync_drops_sections_it_does_not_send(agent):
+    resync = {'url': URL + '/apply', 'version': 1, 'full': True, 'sections': {
+        'title': 'Apply', 'url': URL + '/apply', 'main_content': 'Apply now'}}
+    _, second = sync(agent, FULL, resync)
+    assert (second.title, second.url, second.headings, second.job_listings) == ('Apply', URL + '/apply', (), ())
+
+
+def test_a_failed_sync_forgets_the_version(agent):
+    _, failed, recovered = sync(agent, FULL, RuntimeError('stale element'), FULL)
+    assert failed is EMPTY_SNAPSHOT
+    assert agent.driver.known_versions == [None, 1, None]
+    assert recovered.headings == ('Careers', 'Current openings')
@@ -0,0 +1,70 @@
+import json
+import time
+
+import pytest
+
+from main import ResponseCache
+
+URL = 'https://example.test/services'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / 'responses.json'))
+
+
+def test_filler_words_do_not_change_the_key(cache):
+    cache.put(URL, 'h1', "What services do you offer?", "Web and mobile apps.")
+    assert cache.get(URL, 'h1', "um, what services do you offer please") == "Web and mobile apps."
+    assert cache.stats()['hits'] == 1
+
+
+@pytest.mark.parametrize('query', [
+    "tell me more", "what about the second one", "yes", "okay", "is it remote",
+    "how much do they pay", "and the other one?", "say that again",
+])
+def test_turns_that_refer_back_to_the_conversation_are_not_cacheable(cache, query):
+    assert not cache.cacheable(query)
+
+
+@pytest.mark.parametrize('query', [
+    "what services do you offer", "how do I contact you", "where is your office", "what does the team do",
+])
+def test_standalone_questions_are_cacheable(cache, query):
+    assert cache.cacheable(query)
+
+
+def test_a_changed_page_drops_its_entries(cache):
+    cache.put(URL, 'h1', "what services do you offer", "Web and mobile apps.")
+    assert cache.get(URL, 'h2', "what services do you offer") is None
+    assert cache.get(URL, 'h1', "what services do you offer") is None
+
+
+def test_entries_expire_after_the_ttl(cache):
+    cache.put(URL, 'h1', "what services do you offer", "Web and mobile apps.")
+    for entry in cache.entries.values():
+        entry['created'] = time.time() - cache.ttl - 1
+    assert cache.get(URL, 'h1', "what services do you offer") is None
+
+
+def test_puts_are_written_lazily_and_flushed(tmp_path):
+    path = tmp_path / 'responses.json'
+    cache = ResponseCache(str(path))
+    cache.put(URL, 'h1', "what services do you offer", "Web and mobile apps.")
+    cache.put(URL, 'h1', "where is your office", "In Pune.")
+    assert not path.exists()
+
+    cache.flush()
+    assert len(json.loads(path.read_text())['entries']) == 2
+    reloaded = ResponseCache(str(path))
+    assert reloaded.get(URL, 'h1', "where is your office") == "In Pune."
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.max_entries = 2
+    cache.put(URL, 'h1', "what services do you offer", "a")
+    cache.put(URL, 'h1', "where is your office", "b")
+    cache.get(URL, 'h1', "what services do you offer")
+    cache.put(URL, 'h1', "how do I contact you", "c")
+    assert cache.get(URL, 'h1', "where is your office") is None
+    assert cache.get(URL, 'h1', "what services do you offer") == "a"
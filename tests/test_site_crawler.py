@@ -0,0 +1,123 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import main
+from main import SiteCrawler, SnapshotStore
+
+NAV = '<nav><a href="/">Home</a><a href="/services">Services</a><a href="/about">About</a></nav>'
+
+
+def html(heading):
+    return f'<html><head><title>{heading}</title></head><body>{NAV}<h1>{heading}</h1></body></html>'
+
+
+class FixtureSite:
+    """Serves pages with ETag or Last-Modified validators and answers 304 when they match"""
+
+    def __init__(self):
+        site = self
+        self.requests = []  # (path, If-None-Match, If-Modified-Since)
+        self.pages = {
+            '/': {'body': html('Home'), 'etag': '"home-1"'},
+            '/services': {'body': html('Web development'), 'etag': '"services-1"'},
+            '/about': {'body': html('About us'), 'last_modified': 'Mon, 05 Oct 2026 10:00:00 GMT'},
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                etag, since = self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')
+                site.requests.append((self.path, etag, since))
+                page = site.pages.get(self.path)
+                if page is None:
+                    self.send_error(404)
+                    return
+                if (etag and etag == page.get('etag')) or (since and since == page.get('last_modified')):
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = page['body'].encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if page.get('etag'):
+                    self.send_header('ETag', page['etag'])
+                if page.get('last_modified'):
+                    self.send_header('Last-Modified', page['last_modified'])
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def site():
+    site = FixtureSite()
+    yield site
+    site.close()
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """URLs whose HTML the crawler parsed into a snapshot"""
+    parsed = []
+    original = main.page_content_from_soup
+
+    def counting(soup, url, *args, **kwargs):
+        parsed.append(url)
+        return original(soup, url, *args, **kwargs)
+    monkeypatch.setattr(main, 'page_content_from_soup', counting)
+    return parsed
+
+
+def crawl(site, tmp_path):
+    crawler = SiteCrawler(site.url, [site.url], SnapshotStore(str(tmp_path / 'pages')))
+    crawler.crawl_once()
+    return crawler
+
+
+def test_first_crawl_stores_every_linked_page(site, tmp_path, parses):
+    crawler = crawl(site, tmp_path)
+    assert len(parses) == 3
+    assert crawler.lookup(site.url + 'services').headings == ('Web development',)
+    assert all(etag is None and since is None for path, etag, since in site.requests if path != '/sitemap.xml')
+
+
+def test_revalidation_sends_the_stored_validators(site, tmp_path, parses):
+    crawl(site, tmp_path)
+    site.requests.clear()
+    crawl(site, tmp_path)
+    sent = {path: (etag, since) for path, etag, since in site.requests}
+    assert sent['/'] == ('"home-1"', None)
+    assert sent['/services'] == ('"services-1"', None)
+    assert sent['/about'] == (None, 'Mon, 05 Oct 2026 10:00:00 GMT')
+
+
+def test_unchanged_pages_reuse_the_stored_snapshot(site, tmp_path, parses):
+    first = crawl(site, tmp_path)
+    parses.clear()
+    second = crawl(site, tmp_path)
+    assert parses == []
+    assert second.lookup(site.url + 'about').headings == ('About us',)
+    assert second.verified == first.verified
+    assert second.anchors == first.anchors
+
+
+def test_a_changed_page_replaces_its_snapshot(site, tmp_path, parses):
+    crawl(site, tmp_path)
+    parses.clear()
+    site.pages['/services'] = {'body': html('Mobile apps'), 'etag': '"services-2"'}
+    crawler = crawl(site, tmp_path)
+    assert parses == [site.url + 'services']
+    assert crawler.lookup(site.url + 'services').headings == ('Mobile apps',)
+    assert crawler.store.get(site.url + 'services')['etag'] == '"services-2"'
@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from main import EMPTY_SNAPSHOT, SentenceSplitter
+
+
+def feed_all(pieces):
+    splitter = SentenceSplitter()
+    sentences = []
+    for piece in pieces:
+        sentences += splitter.feed(piece)
+    return sentences, splitter.flush()
+
+
+def test_splitter_emits_sentences_as_they_complete():
+    sentences, rest = feed_all(["We build websites", " and apps. Our team", " is in Pune! Ask", " me anything"])
+    assert sentences == ["We build websites and apps.", "Our team is in Pune!"]
+    assert rest == "Ask me anything"
+
+
+def test_splitter_joins_short_fragments_with_what_follows():
+    sentences, rest = feed_all(["Mr. Rao leads the AI team. ", "Call us."])
+    assert sentences == ["Mr. Rao leads the AI team."]
+    assert rest == "Call us."
+
+
+def test_splitter_does_not_split_decimals_or_lowercase_continuations():
+    sentences, rest = feed_all(["The role pays 4.5 lakh per year. e.g. remote work is fine. ", "Apply today"])
+    assert sentences == ["The role pays 4.5 lakh per year. e.g. remote work is fine."]
+    assert rest == "Apply today"
+
+
+def test_splitter_splits_on_newlines():
+    sentences, rest = feed_all(["First line without stop\nSecond line"])
+    assert sentences == ["First line without stop"]
+    assert rest == "Second line"
+
+
+class FakeSSEServer:
+    """Chat completions endpoint streaming a fixed answer token by token"""
+
+    ANSWER = ("We have openings for AI interns right now. The internship lasts six months. "
+              "Shall I open the career page?")
+
+    def __init__(self, token_delay=0.02, final_pause=0.3):
+        server = self
+        self.finished_at = None
+        self.payloads = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                server.payloads.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                tokens = FakeSSEServer.ANSWER.split(' ')
+                for i, token in enumerate(tokens):
+                    if i == len(tokens) - 1:
+                        time.sleep(final_pause)
+                    self.chunk('data: ' + json.dumps(
+                        {'choices': [{'delta': {'content': token + (' ' if i < len(tokens) - 1 else '')}}]}))
+                    time.sleep(token_delay)
+                self.chunk('data: [DONE]')
+                server.finished_at = time.monotonic()
+                self.wfile.write(b'0\r\n\r\n')
+
+            def chunk(self, line):
+                data = (line + '\n\n').encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b'\r\n')
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/openai/v1/chat/completions"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+@pytest.fixture
+def sse_server():
+    server = FakeSSEServer()
+    yield server
+    server.close()
+
+
+def test_streamed_sentences_arrive_before_the_stream_ends(make_agent, sse_server):
+    agent = make_agent(sse_server.url)
+    heard = []
+    answer = agent.get_ai_response("are there any ai intern positions", EMPTY_SNAPSHOT,
+                                   on_sentence=lambda s: heard.append((time.monotonic(), s)))
+
+    assert sse_server.payloads[0]['stream'] is True
+    assert [s for _, s in heard] == ["We have openings for AI interns right now.",
+                                     "The internship lasts six months.", "Shall I open the career page?"]
+    # The first sentence is spoken while the model is still generating
+    assert heard[0][0] < sse_server.finished_at - 0.2
+    # History and action extraction still see the whole answer
+    assert answer == FakeSSEServer.ANSWER
+    assert agent.conversation_history[-1]['assistant'] == FakeSSEServer.ANSWER
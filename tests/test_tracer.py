@@ -0,0 +1,18 @@
+from main import Tracer
+
+
+def test_disabled_spans_do_not_share_attributes():
+    tracer = Tracer()
+    with tracer.span('extract') as attrs:
+        attrs['webdriver_calls'] = 3
+    with tracer.span('llm') as attrs:
+        assert attrs == {}
+    assert tracer.turn_spans == [] and tracer.histograms == {}
+
+
+def test_enabled_spans_feed_histograms_and_the_turn_trace():
+    tracer = Tracer(enabled=True)
+    with tracer.span('navigate', page='career') as attrs:
+        attrs['cached'] = False
+    assert [(s['name'], s['page'], s['cached']) for s in tracer.turn_spans] == [('navigate', 'career', False)]
+    assert 'agent_stage_seconds_count{stage="navigate"} 1' in tracer.prometheus_text()